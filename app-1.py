@@ -1,16 +1,37 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
 import numpy as np
-import joblib
 import plotly.graph_objects as go
 import plotly.express as px
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
 import matplotlib.pyplot as plt
 import altair as alt
+import pydeck as pdk
 import datetime
+import functools
+import os
 from PIL import Image
 import base64
 from io import BytesIO
+from encoding import CATEGORICAL_COLUMNS, NUM_COLS_TO_SCALE, nearest_tenure
+from arrow_io import ParquetResultWriter
+from batch import read_chunks, score_chunks
+from comparison import ProfileComparison
+from dependence import curves_frame, frame_chunks, partial_dependence
+from rollups import SegmentRollup
+from drift import DriftMonitor, reference_histograms
+from trends import TrendMonitor
+from resources import (load_col_info, load_counterfactual_search, load_encoder, load_model,
+                       load_static_figures)
+from typeahead import TypeaheadIndex
+from validation import REJECT_CHECKS, UploadValidator, validated
+from warmup import start_warmup
+from evaluation import evaluate, file_hash, score_holdout, LABEL_COLUMN
+from shared_store import RESULT_CACHE_FILE, SHARED_DIR, ResultCache, cache_key, cached
+from scoring import risk_level, predict_proba, score_with_contributions, global_importances, model_version
+from session_memory import SESSION_BUDGET_MB, SessionCache, SessionRegistry, enforce_budget, load_frame
+from targeting import DEFAULT_COST, DEFAULT_UPLIFT, TargetSelector
+from thresholds import load_bands, save_bands, sweep_cutoffs, optimal_bands
 
 # Set page configuration
 st.set_page_config(
@@ -67,6 +88,18 @@ if 'last_prediction' not in st.session_state:
     st.session_state.last_prediction = None
 if 'prediction_history' not in st.session_state:
     st.session_state.prediction_history = []
+if 'batch_results' not in st.session_state:
+    st.session_state.batch_results = None
+if 'batch_rollup' not in st.session_state:
+    st.session_state.batch_rollup = None
+if 'batch_key' not in st.session_state:
+    st.session_state.batch_key = None
+if 'batch_results_key' not in st.session_state:
+    st.session_state.batch_results_key = None
+if 'batch_cache' not in st.session_state:
+    st.session_state.batch_cache = SessionCache()
+if 'batch_validation' not in st.session_state:
+    st.session_state.batch_validation = None
 
 # Get current theme colors
 current_theme = theme_colors[st.session_state.theme]
@@ -248,17 +281,174 @@ st.markdown(f"""
 </style>
 """, unsafe_allow_html=True)
 
-# Load saved model & references
+HOLDOUT_PATH = "holdout.csv"
+
+# The model, column stats, encoder and static figures are loaded once per process by
+# resources.py (primed at server start by warmup.py); the caches below derive from them
 @st.cache_resource
-def load_model():
-    return joblib.load("clf.joblib")
+def load_result_cache():
+    # Results reused across worker processes; None when running a single process
+    return ResultCache(os.path.join(SHARED_DIR, RESULT_CACHE_FILE)) if SHARED_DIR else None
 
 @st.cache_data
-def load_col_info():
-    return joblib.load("unique_elements_dict2.joblib")
+def load_global_importances(version):
+    return global_importances(load_model(version), load_encoder(version))
+
+@st.cache_data(show_spinner=False)
+def load_scored_holdout(version, holdout_hash, _holdout_bytes):
+    # Keyed by model version and holdout hash; the bytes themselves are not hashed again
+    return cached(load_result_cache(), cache_key("scored_holdout", version, holdout_hash),
+                  lambda: score_holdout(BytesIO(_holdout_bytes), load_model(version), load_encoder(version)))
+
+@st.cache_data(show_spinner=False)
+def load_evaluation(version, holdout_hash, _holdout_bytes):
+    def compute():
+        scored = load_scored_holdout(version, holdout_hash, _holdout_bytes)
+        return evaluate(scored[LABEL_COLUMN].to_numpy(), scored["CHURN_PROBABILITY"].to_numpy())
+    return cached(load_result_cache(), cache_key("evaluation", version, holdout_hash), compute)
+
+@st.cache_data(show_spinner=False)
+def load_file_hash(path, mtime_ns, size):
+    # Content hash of a file on disk, re-read only when its modification time or size changes
+    with open(path, "rb") as f:
+        return file_hash(f.read())
+
+@st.cache_data(show_spinner=False)
+def load_dependence(version, dataset_key, col, n_ice, precision, _frames):
+    # Keyed by model version, dataset hash, feature and precision; _frames yields the raw chunks
+    return cached(load_result_cache(), cache_key("dependence", version, dataset_key, col, n_ice, precision),
+                  lambda: partial_dependence(load_model(version), load_encoder(version), load_col_info(version),
+                                             _frames(), col, n_ice=n_ice, dtype=np.dtype(precision)))
+
+@st.cache_resource
+def load_trend_monitor():
+    # Time rollups of every prediction, shared by every session
+    return TrendMonitor()
+
+@st.cache_resource
+def load_session_registry():
+    # One registry per server process, shared by every session
+    return SessionRegistry()
 
-model = load_model()
-col_info = load_col_info()
+@st.cache_resource
+def load_pack_index(version):
+    packs = load_encoder(version).vocabularies["TOP_PACK"]
+    return TypeaheadIndex(packs.labels, load_col_info(version).get("FREQUENCIES", {}).get("TOP_PACK"))
+
+@st.cache_resource
+def load_drift_monitor(version):
+    # One monitor per model version, shared by every session
+    vocabularies = load_encoder(version).vocabularies
+    return DriftMonitor(reference_histograms(load_col_info(version), vocabularies), vocabularies)
+
+current_version = model_version()
+# Already running when serve.py started this worker; otherwise starts with the first session
+warmup = start_warmup(current_version)
+model = load_model(current_version)
+col_info = load_col_info(current_version)
+encoder = load_encoder(current_version)
+vocabularies = encoder.vocabularies
+# Risk band lower bounds (High, Medium) shared by every scoring path
+high_risk, medium_risk = load_bands()
+pack_index = load_pack_index(current_version)
+counterfactual_search = load_counterfactual_search(current_version)
+drift_monitor = load_drift_monitor(current_version)
+trend_monitor = load_trend_monitor()
+session_registry = load_session_registry()
+session_id = get_script_run_ctx().session_id
+
+def parquet_bytes(frame):
+    # zstd-compressed Parquet keeps the categorical columns dictionary-encoded
+    buffer = BytesIO()
+    with ParquetResultWriter(buffer) as writer:
+        writer.write(frame)
+    return buffer.getvalue()
+
+def prepared_download(label, data_key, build, file_name, mime):
+    """Download button for a large file that is built only when asked for.
+
+    The bytes are kept in the session's batch cache, so they count against its memory
+    budget and are dropped (to be prepared again) when the session needs the room.
+    """
+    cache = st.session_state.batch_cache
+    data = cache.peek(data_key)
+    if data is None and st.button(f"Prepare {label}", key=f"prepare_{file_name}"):
+        with st.spinner(f"Preparing {label}..."):
+            data = cache.get(data_key, build)
+    if data is not None:
+        st.download_button(f"Download {label}", data=data, file_name=file_name, mime=mime)
+
+def preset_index(col, value):
+    """Selectbox index of a preset category; 0 only when no preset is loaded."""
+    if value is None:
+        return 0
+    vocab = vocabularies[col]
+    if col == "TENURE":
+        # Tenure bands are matched by their letter when the wording differs
+        value = nearest_tenure(vocab.labels, value)
+    code = vocab.code(value)
+    if code < 0:
+        raise ValueError(f"Preset {col} {value!r} is not in the model's vocabulary")
+    return code
+
+def preset_profiles():
+    """Raw values of the sidebar's High, Medium and Low risk example customers."""
+    return {
+        "High Risk": {
+            "REGION": vocabularies["REGION"].labels[0],
+            "TENURE": nearest_tenure(vocabularies["TENURE"].labels, "A < 1 month"),
+            "MONTANT": float(np.max(col_info["MONTANT"])) * 0.2,
+            "FREQUENCE_RECH": float(np.min(col_info["FREQUENCE_RECH"])) + 1,
+            "REVENUE": float(np.min(col_info["REVENUE"])),
+            "ARPU_SEGMENT": float(np.min(col_info["ARPU_SEGMENT"])),
+            "FREQUENCE": float(np.min(col_info["FREQUENCE"])),
+            "DATA_VOLUME": float(np.min(col_info["DATA_VOLUME"])),
+            "ON_NET": float(np.min(col_info["ON_NET"])),
+            "ORANGE": float(np.max(col_info["ORANGE"])) * 0.8,
+            "TIGO": float(np.max(col_info["TIGO"])) * 0.8,
+            "REGULARITY": float(np.min(col_info["REGULARITY"])),
+            "TOP_PACK": vocabularies["TOP_PACK"].labels[0],
+            "FREQ_TOP_PACK": float(np.min(col_info["FREQ_TOP_PACK"]))
+        },
+        "Medium Risk": {
+            "REGION": vocabularies["REGION"].labels[1],
+            "TENURE": nearest_tenure(vocabularies["TENURE"].labels, "E 9-12 month"),
+            "MONTANT": float(np.max(col_info["MONTANT"])) * 0.5,
+            "FREQUENCE_RECH": float(np.max(col_info["FREQUENCE_RECH"])) * 0.5,
+            "REVENUE": float(np.max(col_info["REVENUE"])) * 0.5,
+            "ARPU_SEGMENT": float(np.max(col_info["ARPU_SEGMENT"])) * 0.5,
+            "FREQUENCE": float(np.max(col_info["FREQUENCE"])) * 0.5,
+            "DATA_VOLUME": float(np.max(col_info["DATA_VOLUME"])) * 0.5,
+            "ON_NET": float(np.max(col_info["ON_NET"])) * 0.5,
+            "ORANGE": float(np.max(col_info["ORANGE"])) * 0.5,
+            "TIGO": float(np.max(col_info["TIGO"])) * 0.5,
+            "REGULARITY": float(np.max(col_info["REGULARITY"])) * 0.5,
+            "TOP_PACK": vocabularies["TOP_PACK"].labels[1],
+            "FREQ_TOP_PACK": float(np.max(col_info["FREQ_TOP_PACK"])) * 0.5
+        },
+        "Low Risk": {
+            "REGION": vocabularies["REGION"].labels[2],
+            "TENURE": nearest_tenure(vocabularies["TENURE"].labels, "K > 24 month"),
+            "MONTANT": float(np.max(col_info["MONTANT"])) * 0.8,
+            "FREQUENCE_RECH": float(np.max(col_info["FREQUENCE_RECH"])) * 0.8,
+            "REVENUE": float(np.max(col_info["REVENUE"])) * 0.8,
+            "ARPU_SEGMENT": float(np.max(col_info["ARPU_SEGMENT"])) * 0.8,
+            "FREQUENCE": float(np.max(col_info["FREQUENCE"])) * 0.8,
+            "DATA_VOLUME": float(np.max(col_info["DATA_VOLUME"])) * 0.8,
+            "ON_NET": float(np.max(col_info["ON_NET"])) * 0.8,
+            "ORANGE": float(np.min(col_info["ORANGE"])) + 1,
+            "TIGO": float(np.min(col_info["TIGO"])) + 1,
+            "REGULARITY": float(np.max(col_info["REGULARITY"])) * 0.8,
+            "TOP_PACK": vocabularies["TOP_PACK"].labels[2],
+            "FREQ_TOP_PACK": float(np.max(col_info["FREQ_TOP_PACK"])) * 0.8
+        },
+    }
+
+# Profiles compared side by side; the presets are scored together in one call
+if 'comparison' not in st.session_state:
+    st.session_state.comparison = ProfileComparison(model, encoder, current_version).add(preset_profiles())
+elif st.session_state.comparison.version != current_version:
+    st.session_state.comparison = st.session_state.comparison.rescored(model, encoder, current_version)
 
 # Sidebar for dashboard customization
 with st.sidebar:
@@ -285,68 +475,39 @@ with st.sidebar:
     
     # Preset profiles for quick testing
     st.header("Preset Profiles")
-    if st.button("High Risk Customer"):
-        st.session_state.preset_profile = {
-            "REGION": col_info["REGION"][0],
-            "TENURE": "A < 1 month",
-            "MONTANT": float(max(col_info["MONTANT"])) * 0.2,
-            "FREQUENCE_RECH": float(min(col_info["FREQUENCE_RECH"])) + 1,
-            "REVENUE": float(min(col_info["REVENUE"])),
-            "ARPU_SEGMENT": float(min(col_info["ARPU_SEGMENT"])),
-            "FREQUENCE": float(min(col_info["FREQUENCE"])),
-            "DATA_VOLUME": float(min(col_info["DATA_VOLUME"])),
-            "ON_NET": float(min(col_info["ON_NET"])),
-            "ORANGE": float(max(col_info["ORANGE"])) * 0.8,
-            "TIGO": float(max(col_info["TIGO"])) * 0.8,
-            "REGULARITY": float(min(col_info["REGULARITY"])),
-            "TOP_PACK": col_info["TOP_PACK"][0],
-            "FREQ_TOP_PACK": float(min(col_info["FREQ_TOP_PACK"]))
-        }
-        st.rerun()
-    
-    if st.button("Medium Risk Customer"):
-        st.session_state.preset_profile = {
-            "REGION": col_info["REGION"][1],
-            "TENURE": "E 9-12 month",
-            "MONTANT": float(max(col_info["MONTANT"])) * 0.5,
-            "FREQUENCE_RECH": float(max(col_info["FREQUENCE_RECH"])) * 0.5,
-            "REVENUE": float(max(col_info["REVENUE"])) * 0.5,
-            "ARPU_SEGMENT": float(max(col_info["ARPU_SEGMENT"])) * 0.5,
-            "FREQUENCE": float(max(col_info["FREQUENCE"])) * 0.5,
-            "DATA_VOLUME": float(max(col_info["DATA_VOLUME"])) * 0.5,
-            "ON_NET": float(max(col_info["ON_NET"])) * 0.5,
-            "ORANGE": float(max(col_info["ORANGE"])) * 0.5,
-            "TIGO": float(max(col_info["TIGO"])) * 0.5,
-            "REGULARITY": float(max(col_info["REGULARITY"])) * 0.5,
-            "TOP_PACK": col_info["TOP_PACK"][1],
-            "FREQ_TOP_PACK": float(max(col_info["FREQ_TOP_PACK"])) * 0.5
-        }
-        st.rerun()
-    
-    if st.button("Low Risk Customer"):
-        st.session_state.preset_profile = {
-            "REGION": col_info["REGION"][2],
-            "TENURE": "K > 24 month",
-            "MONTANT": float(max(col_info["MONTANT"])) * 0.8,
-            "FREQUENCE_RECH": float(max(col_info["FREQUENCE_RECH"])) * 0.8,
-            "REVENUE": float(max(col_info["REVENUE"])) * 0.8,
-            "ARPU_SEGMENT": float(max(col_info["ARPU_SEGMENT"])) * 0.8,
-            "FREQUENCE": float(max(col_info["FREQUENCE"])) * 0.8,
-            "DATA_VOLUME": float(max(col_info["DATA_VOLUME"])) * 0.8,
-            "ON_NET": float(max(col_info["ON_NET"])) * 0.8,
-            "ORANGE": float(min(col_info["ORANGE"])) + 1,
-            "TIGO": float(min(col_info["TIGO"])) + 1,
-            "REGULARITY": float(max(col_info["REGULARITY"])) * 0.8,
-            "TOP_PACK": col_info["TOP_PACK"][2],
-            "FREQ_TOP_PACK": float(max(col_info["FREQ_TOP_PACK"])) * 0.8
-        }
-        st.rerun()
+    presets = preset_profiles()
+    for name, profile in presets.items():
+        if st.button(f"{name} Customer"):
+            st.session_state.preset_profile = profile
+            st.rerun()
     
     # Reset dashboard
     if st.button("Reset Dashboard"):
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         st.rerun()
+    
+    # Session memory as measured at the end of the previous run
+    st.header("Session Memory")
+    session_sizes = session_registry.sessions.get(session_id, {}).get("sizes", {})
+    st.progress(
+        min(sum(session_sizes.values()) / (SESSION_BUDGET_MB * 1024 ** 2), 1.0),
+        text=f"{sum(session_sizes.values()) / 1024 ** 2:,.1f} of {SESSION_BUDGET_MB:,.0f} MB"
+    )
+    with st.expander("Largest Sessions on This Server"):
+        st.caption(f"{len(session_registry.sessions)} sessions, {session_registry.total_mb():,.1f} MB in total")
+        st.dataframe(session_registry.table(), hide_index=True, use_container_width=True)
+    
+    # Cache warm-up of this server process
+    st.header("Server Status")
+    if not warmup.is_ready():
+        st.caption("Warming up caches; the first requests may be slower.")
+    elif warmup.errors:
+        st.warning(f"{len(warmup.errors)} warm-up step(s) failed; those features load on first use.")
+    else:
+        st.caption("Ready: model, encoders and figures are loaded.")
+    with st.expander("Warm-up Steps"):
+        st.dataframe(warmup.status(), hide_index=True, use_container_width=True)
 
 # Create a logo and title section
 col1, col2, col3 = st.columns([1, 2, 1])
@@ -356,16 +517,34 @@ with col2:
     st.markdown('<p style="text-align: center;">Predict customer churn probability based on telecom usage patterns</p>', unsafe_allow_html=True)
 
 # Create main tabs
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Prediction Dashboard", "📈 Data Insights", "🎬 Media Resources", "ℹ️ About"])
+tab1, tab_batch, tab2, tab3, tab4 = st.tabs(["📊 Prediction Dashboard", "📂 Batch Scoring", "📈 Data Insights", "🎬 Media Resources", "ℹ️ About"])
 
 with tab1:
+    # Use preset profile if available
+    preset_values = {}
+    if 'preset_profile' in st.session_state:
+        preset_values = st.session_state.preset_profile
+        del st.session_state.preset_profile
+    
+    # TOP_PACK search lives outside the form so typing narrows the options immediately;
+    # only the best matches are sent to the browser
+    if st.session_state.show_package_info:
+        top_pack_query = st.text_input(
+            "Search TOP_PACK",
+            key="top_pack_query",
+            placeholder="Type part of a package name, e.g. Data or Unlimited",
+            help="Narrows the TOP_PACK options below to the most used matching packages"
+        )
+        top_pack_options = pack_index.search(top_pack_query)
+        if not top_pack_options:
+            st.caption("No package matches this search; showing the most used packages.")
+            top_pack_options = pack_index.search("")
+        if "TOP_PACK" in preset_values:
+            # Preset goes first so the widget selects it at index 0
+            top_pack_options = [preset_values["TOP_PACK"]] + [p for p in top_pack_options if p != preset_values["TOP_PACK"]]
+    
     # Create a form for user input
     with st.form("predict_form"):
-        # Use preset profile if available
-        preset_values = {}
-        if 'preset_profile' in st.session_state:
-            preset_values = st.session_state.preset_profile
-            del st.session_state.preset_profile
         
         # Group 1: Customer Profile
         if st.session_state.show_customer_profile:
@@ -377,14 +556,14 @@ with tab1:
                 st.markdown('<p class="section-header">Customer Demographics</p>', unsafe_allow_html=True)
                 REGION = st.selectbox(
                     "REGION", 
-                    col_info["REGION"],
-                    index=col_info["REGION"].index(preset_values.get("REGION", col_info["REGION"][0])) if "REGION" in preset_values else 0,
+                    vocabularies["REGION"].labels,
+                    index=preset_index("REGION", preset_values.get("REGION")),
                     help="The geographical region where the customer is located"
                 )
                 TENURE = st.selectbox(
                     "TENURE", 
-                    col_info["TENURE"],
-                    index=col_info["TENURE"].index(preset_values.get("TENURE", col_info["TENURE"][0])) if "TENURE" in preset_values else 0,
+                    vocabularies["TENURE"].labels,
+                    index=preset_index("TENURE", preset_values.get("TENURE")),
                     help="How long the customer has been with Expresso"
                 )
             
@@ -392,16 +571,16 @@ with tab1:
                 st.markdown('<p class="section-header">Financial Metrics</p>', unsafe_allow_html=True)
                 REVENUE = st.slider(
                     "REVENUE", 
-                    min_value=float(min(col_info["REVENUE"])), 
-                    max_value=float(max(col_info["REVENUE"])), 
-                    value=preset_values.get("REVENUE", float(min(col_info["REVENUE"]))),
+                    min_value=float(np.min(col_info["REVENUE"])), 
+                    max_value=float(np.max(col_info["REVENUE"])), 
+                    value=preset_values.get("REVENUE", float(np.min(col_info["REVENUE"]))),
                     help="Total revenue generated by the customer"
                 )
                 ARPU_SEGMENT = st.slider(
                     "ARPU_SEGMENT", 
-                    min_value=float(min(col_info["ARPU_SEGMENT"])), 
-                    max_value=float(max(col_info["ARPU_SEGMENT"])), 
-                    value=preset_values.get("ARPU_SEGMENT", float(min(col_info["ARPU_SEGMENT"]))),
+                    min_value=float(np.min(col_info["ARPU_SEGMENT"])), 
+                    max_value=float(np.max(col_info["ARPU_SEGMENT"])), 
+                    value=preset_values.get("ARPU_SEGMENT", float(np.min(col_info["ARPU_SEGMENT"]))),
                     help="Average Revenue Per User segment"
                 )
             st.markdown('</div>', unsafe_allow_html=True)
@@ -416,16 +595,16 @@ with tab1:
                 st.markdown('<p class="section-header">Recharge Behavior</p>', unsafe_allow_html=True)
                 MONTANT = st.slider(
                     "MONTANT", 
-                    min_value=float(min(col_info["MONTANT"])), 
-                    max_value=float(max(col_info["MONTANT"])), 
-                    value=preset_values.get("MONTANT", float(min(col_info["MONTANT"]))),
+                    min_value=float(np.min(col_info["MONTANT"])), 
+                    max_value=float(np.max(col_info["MONTANT"])), 
+                    value=preset_values.get("MONTANT", float(np.min(col_info["MONTANT"]))),
                     help="Amount recharged by the customer"
                 )
                 FREQUENCE_RECH = st.slider(
                     "FREQUENCE_RECH", 
-                    min_value=float(min(col_info["FREQUENCE_RECH"])), 
-                    max_value=float(max(col_info["FREQUENCE_RECH"])), 
-                    value=preset_values.get("FREQUENCE_RECH", float(min(col_info["FREQUENCE_RECH"]))),
+                    min_value=float(np.min(col_info["FREQUENCE_RECH"])), 
+                    max_value=float(np.max(col_info["FREQUENCE_RECH"])), 
+                    value=preset_values.get("FREQUENCE_RECH", float(np.min(col_info["FREQUENCE_RECH"]))),
                     help="Frequency of recharges"
                 )
             
@@ -433,16 +612,16 @@ with tab1:
                 st.markdown('<p class="section-header">Data Usage</p>', unsafe_allow_html=True)
                 FREQUENCE = st.slider(
                     "FREQUENCE", 
-                    min_value=float(min(col_info["FREQUENCE"])), 
-                    max_value=float(max(col_info["FREQUENCE"])), 
-                    value=preset_values.get("FREQUENCE", float(min(col_info["FREQUENCE"]))),
+                    min_value=float(np.min(col_info["FREQUENCE"])), 
+                    max_value=float(np.max(col_info["FREQUENCE"])), 
+                    value=preset_values.get("FREQUENCE", float(np.min(col_info["FREQUENCE"]))),
                     help="Frequency of usage"
                 )
                 DATA_VOLUME = st.slider(
                     "DATA_VOLUME", 
-                    min_value=float(min(col_info["DATA_VOLUME"])), 
-                    max_value=float(max(col_info["DATA_VOLUME"])), 
-                    value=preset_values.get("DATA_VOLUME", float(min(col_info["DATA_VOLUME"]))),
+                    min_value=float(np.min(col_info["DATA_VOLUME"])), 
+                    max_value=float(np.max(col_info["DATA_VOLUME"])), 
+                    value=preset_values.get("DATA_VOLUME", float(np.min(col_info["DATA_VOLUME"]))),
                     help="Volume of data used by the customer"
                 )
             
@@ -450,16 +629,16 @@ with tab1:
                 st.markdown('<p class="section-header">Network Usage</p>', unsafe_allow_html=True)
                 ON_NET = st.slider(
                     "ON_NET", 
-                    min_value=float(min(col_info["ON_NET"])), 
-                    max_value=float(max(col_info["ON_NET"])), 
-                    value=preset_values.get("ON_NET", float(min(col_info["ON_NET"]))),
+                    min_value=float(np.min(col_info["ON_NET"])), 
+                    max_value=float(np.max(col_info["ON_NET"])), 
+                    value=preset_values.get("ON_NET", float(np.min(col_info["ON_NET"]))),
                     help="Calls made within the Expresso network"
                 )
                 REGULARITY = st.slider(
                     "REGULARITY", 
-                    min_value=float(min(col_info["REGULARITY"])), 
-                    max_value=float(max(col_info["REGULARITY"])), 
-                    value=preset_values.get("REGULARITY", float(min(col_info["REGULARITY"]))),
+                    min_value=float(np.min(col_info["REGULARITY"])), 
+                    max_value=float(np.max(col_info["REGULARITY"])), 
+                    value=preset_values.get("REGULARITY", float(np.min(col_info["REGULARITY"]))),
                     help="Regularity of usage"
                 )
             st.markdown('</div>', unsafe_allow_html=True)
@@ -473,18 +652,18 @@ with tab1:
             with col1:
                 ORANGE = st.slider(
                     "ORANGE", 
-                    min_value=float(min(col_info["ORANGE"])), 
-                    max_value=float(max(col_info["ORANGE"])), 
-                    value=preset_values.get("ORANGE", float(min(col_info["ORANGE"]))),
+                    min_value=float(np.min(col_info["ORANGE"])), 
+                    max_value=float(np.max(col_info["ORANGE"])), 
+                    value=preset_values.get("ORANGE", float(np.min(col_info["ORANGE"]))),
                     help="Calls made to Orange network"
                 )
             
             with col2:
                 TIGO = st.slider(
                     "TIGO", 
-                    min_value=float(min(col_info["TIGO"])), 
-                    max_value=float(max(col_info["TIGO"])), 
-                    value=preset_values.get("TIGO", float(min(col_info["TIGO"]))),
+                    min_value=float(np.min(col_info["TIGO"])), 
+                    max_value=float(np.max(col_info["TIGO"])), 
+                    value=preset_values.get("TIGO", float(np.min(col_info["TIGO"]))),
                     help="Calls made to Tigo network"
                 )
             st.markdown('</div>', unsafe_allow_html=True)
@@ -498,17 +677,17 @@ with tab1:
             with col1:
                 TOP_PACK = st.selectbox(
                     "TOP_PACK", 
-                    col_info["TOP_PACK"],
-                    index=col_info["TOP_PACK"].index(preset_values.get("TOP_PACK", col_info["TOP_PACK"][0])) if "TOP_PACK" in preset_values else 0,
+                    top_pack_options,
+                    index=0,
                     help="The top package used by the customer"
                 )
             
             with col2:
                 FREQ_TOP_PACK = st.slider(
                     "FREQ_TOP_PACK", 
-                    min_value=float(min(col_info["FREQ_TOP_PACK"])), 
-                    max_value=float(max(col_info["FREQ_TOP_PACK"])), 
-                    value=preset_values.get("FREQ_TOP_PACK", float(min(col_info["FREQ_TOP_PACK"]))),
+                    min_value=float(np.min(col_info["FREQ_TOP_PACK"])), 
+                    max_value=float(np.max(col_info["FREQ_TOP_PACK"])), 
+                    value=preset_values.get("FREQ_TOP_PACK", float(np.min(col_info["FREQ_TOP_PACK"]))),
                     help="Frequency of using the top package"
                 )
             st.markdown('</div>', unsafe_allow_html=True)
@@ -521,8 +700,8 @@ with tab1:
     if submitted:
         # Create a spinner to show processing
         with st.spinner('Analyzing customer data...'):
-            # 1. Raw input to DataFrame
-            df = pd.DataFrame([{
+            # 1. Raw input straight into the model's feature row
+            customer_values = {
                 "REGION": REGION,
                 "TENURE": TENURE,
                 "MONTANT": MONTANT,
@@ -537,47 +716,16 @@ with tab1:
                 "REGULARITY": REGULARITY,
                 "TOP_PACK": TOP_PACK,
                 "FREQ_TOP_PACK": FREQ_TOP_PACK
-            }])
-
-            # Frequency encode REGION using external full dataset frequencies
-            region_freq = df['REGION'].value_counts(normalize=False)
-            df['REGION_FE'] = df['REGION'].map(region_freq)
-
-            # Normalize REGION_FE
-            scaler_region = MinMaxScaler()
-            df['REGION_FE'] = scaler_region.fit_transform(df[['REGION_FE']])
-
-            # Ordinal encode TENURE
-            tenure_order = ['A < 1 month', 'B 1-3 month', 'C 3-6 month', 'D 6-9 month',
-                            'E 9-12 month', 'F 12-15 month', 'G 15-18 month', 'H 18-21 month',
-                            'I 21-24 month', 'J 24 month', 'K > 24 month']
-            df['TENURE_OE'] = df['TENURE'].astype(pd.CategoricalDtype(categories=tenure_order, ordered=True)).cat.codes
-            
-            # Frequency encode TOP_PACK
-            top_pack_freq = df['TOP_PACK'].value_counts()
-            df['TOP_PACK_FE'] = df['TOP_PACK'].map(top_pack_freq)
-
-            # Normalize the frequency encoding to [0,1]
-            scaler = MinMaxScaler()
-            df['TOP_PACK_FE'] = scaler.fit_transform(df[['TOP_PACK_FE']])
-
-            # Drop original column
-            df.drop(columns=['TOP_PACK'], inplace=True)
-            # Drop original non-numeric columns
-            df.drop(columns=['REGION', 'TENURE'], inplace=True)
-
-            # Columns to scale (excluding target and already normalized/ordinal encoded ones)
-            num_cols_to_scale = [
-                'MONTANT', 'FREQUENCE_RECH', 'REVENUE', 'ARPU_SEGMENT',
-                'FREQUENCE', 'DATA_VOLUME', 'ON_NET', 'ORANGE', 'TIGO', 'REGULARITY', 'FREQ_TOP_PACK'
-            ]
+            }
+            st.session_state.last_customer_values = customer_values
+            x = encoder.encode_row(customer_values)
+            drift_monitor.update_row(customer_values)
 
-            scaler = StandardScaler()
-            df[num_cols_to_scale] = scaler.fit_transform(df[num_cols_to_scale]) 
-            
             # Predict & Display
-            prediction = model.predict(df)[0]
-            prob = model.predict_proba(df)[0][1]
+            probs, contributions, base_logit = score_with_contributions(model, x, encoder.feature_means)
+            prob = float(probs[0])
+            trend_monitor.update(probs, high_risk)
+            prediction = int(prob >= 0.5)
             
             # Store prediction in session state
             st.session_state.last_prediction = {
@@ -616,9 +764,9 @@ with tab1:
                         'axis': {'range': [0, 100]},
                         'bar': {'color': current_theme["primary"]},
                         'steps': [
-                            {'range': [0, 30], 'color': "#E8F5E9"},
-                            {'range': [30, 70], 'color': "#FFF8E1"},
-                            {'range': [70, 100], 'color': "#FFEBEE"}
+                            {'range': [0, medium_risk * 100], 'color': "#E8F5E9"},
+                            {'range': [medium_risk * 100, high_risk * 100], 'color': "#FFF8E1"},
+                            {'range': [high_risk * 100, 100], 'color': "#FFEBEE"}
                         ],
                         'threshold': {
                             'line': {'color': "red", 'width': 4},
@@ -633,18 +781,18 @@ with tab1:
             
             with col2:
                 # Determine risk level and display appropriate message
-                if prob >= 0.7:
-                    risk_level = "High"
+                if prob >= high_risk:
+                    risk_label = "High"
                     box_class = "prediction-box-high"
                     icon = "⚠️"
                     message = "This customer is at high risk of churning."
-                elif prob >= 0.3:
-                    risk_level = "Medium"
+                elif prob >= medium_risk:
+                    risk_label = "Medium"
                     box_class = "prediction-box-medium"
                     icon = "⚠️"
                     message = "This customer is at moderate risk of churning."
                 else:
-                    risk_level = "Low"
+                    risk_label = "Low"
                     box_class = "prediction-box-low"
                     icon = "✅"
                     message = "This customer is at low risk of churning."
@@ -652,7 +800,7 @@ with tab1:
                 # Display prediction result with styling
                 st.markdown(f"""
                 <div class="{box_class}">
-                    <h3>{icon} Churn Risk: {risk_level}</h3>
+                    <h3>{icon} Churn Risk: {risk_label}</h3>
                     <p>{message}</p>
                     <p>Churn Probability: <b>{prob:.2%}</b></p>
                 </div>
@@ -661,14 +809,14 @@ with tab1:
                 # Display recommended actions based on risk level
                 st.markdown("### Recommended Actions")
                 
-                if risk_level == "High":
+                if risk_label == "High":
                     st.markdown("""
                     - 📞 **Immediate Outreach**: Contact customer with personalized retention offer
                     - 💰 **Special Discount**: Offer significant discount on their preferred services
                     - 🎁 **Loyalty Bonus**: Provide immediate loyalty bonus or free service upgrade
                     - 📊 **Usage Analysis**: Review customer usage patterns for targeted improvements
                     """)
-                elif risk_level == "Medium":
+                elif risk_label == "Medium":
                     st.markdown("""
                     - 📱 **Service Check**: Proactively check if customer is satisfied with services
                     - 🎁 **Targeted Offer**: Send targeted offer based on usage patterns
@@ -682,36 +830,66 @@ with tab1:
                     - 🌟 **Referral Program**: Invite to participate in referral program
                     - 📊 **Regular Check-ins**: Schedule periodic service reviews
                     """)
+                
+                if prob >= medium_risk:
+                    # Smallest change to actionable features that moves this customer into the
+                    # Low band, exact for the linear model and within the reference ranges
+                    st.markdown("### What Would Keep This Customer")
+                    plan = counterfactual_search.search(pd.DataFrame([customer_values]), medium_risk, x).iloc[0]
+                    changes = {
+                        col: plan[f"CHANGE_{col}"]
+                        for col in counterfactual_search.columns if plan[f"CHANGE_{col}"] != 0
+                    }
+                    if plan["FEASIBLE"]:
+                        st.markdown(
+                            "Smallest combined change that brings churn probability to "
+                            f"**{plan['COUNTERFACTUAL_PROBABILITY']:.2%}**:\n"
+                            + "\n".join(f"- **{col}**: {customer_values[col]:,.0f} → {customer_values[col] + change:,.0f}"
+                                         for col, change in changes.items())
+                        )
+                    else:
+                        st.markdown("No change within the observed ranges of the actionable features reaches the Low band.")
+                    with st.expander("Single-feature options"):
+                        st.dataframe(counterfactual_search.single_lever_options(customer_values, medium_risk),
+                                     use_container_width=True)
             
             # Feature importance visualization
             st.markdown("### Key Factors Influencing Prediction")
             
-            # For demonstration, using dummy feature importance values
-            # In a real scenario, you would extract these from your model
-            feature_importance = {
-                'REVENUE': 0.25,
-                'TENURE_OE': 0.20,
-                'MONTANT': 0.15,
-                'FREQUENCE': 0.12,
-                'DATA_VOLUME': 0.10,
-                'ORANGE': 0.08,
-                'TIGO': 0.05,
-                'REGULARITY': 0.05
-            }
+            col1, col2 = st.columns(2)
             
-            # Create a horizontal bar chart for feature importance
-            fig = px.bar(
-                x=list(feature_importance.values()),
-                y=list(feature_importance.keys()),
-                orientation='h',
-                labels={'x': 'Importance', 'y': 'Feature'},
-                title='Feature Importance',
-                color=list(feature_importance.values()),
-                color_continuous_scale=f'{st.session_state.theme}s'
-            )
+            with col1:
+                # This customer: signed contribution of each feature to the churn logit,
+                # relative to the average subscriber
+                local = pd.Series(contributions[0], index=encoder.feature_names)
+                local = local.reindex(local.abs().sort_values().index)
+                fig = px.bar(
+                    x=local.values,
+                    y=local.index,
+                    orientation='h',
+                    labels={'x': 'Contribution to churn log-odds', 'y': 'Feature'},
+                    title='Drivers for This Customer',
+                    color=np.where(local.values > 0, 'Raises churn risk', 'Lowers churn risk'),
+                    color_discrete_map={'Raises churn risk': '#F44336', 'Lowers churn risk': '#4CAF50'}
+                )
+                fig.update_layout(height=400, margin=dict(l=20, r=20, t=50, b=20), legend_title_text='')
+                st.plotly_chart(fig, use_container_width=True)
             
-            fig.update_layout(height=400, margin=dict(l=20, r=20, t=50, b=20))
-            st.plotly_chart(fig, use_container_width=True)
+            with col2:
+                # All customers: standardised coefficients of the model
+                feature_importance = load_global_importances(current_version)
+                feature_importance = dict(sorted(feature_importance.items(), key=lambda item: item[1]))
+                fig = px.bar(
+                    x=list(feature_importance.values()),
+                    y=list(feature_importance.keys()),
+                    orientation='h',
+                    labels={'x': 'Importance', 'y': 'Feature'},
+                    title='Feature Importance (All Customers)',
+                    color=list(feature_importance.values()),
+                    color_continuous_scale=f'{st.session_state.theme}s'
+                )
+                fig.update_layout(height=400, margin=dict(l=20, r=20, t=50, b=20))
+                st.plotly_chart(fig, use_container_width=True)
             
             # What-if analysis section
             st.markdown("### What-If Analysis")
@@ -721,13 +899,10 @@ with tab1:
             
             with what_if_tabs[0]:
                 # Revenue impact analysis
-                revenue_values = np.linspace(float(min(col_info["REVENUE"])), float(max(col_info["REVENUE"])), 10)
-                revenue_probs = []
-                
-                for rev in revenue_values:
-                    df_what_if = df.copy()
-                    df_what_if['REVENUE'] = scaler.transform([[rev]])[0][0]  # Scale the new revenue value
-                    revenue_probs.append(model.predict_proba(df_what_if)[0][1])
+                revenue_values = np.linspace(float(np.min(col_info["REVENUE"])), float(np.max(col_info["REVENUE"])), 10)
+                X_what_if = np.repeat(x, len(revenue_values), axis=0)
+                X_what_if[:, encoder.position['REVENUE']] = encoder.scale('REVENUE', revenue_values)
+                revenue_probs = predict_proba(model, X_what_if)
                 
                 fig = px.line(
                     x=revenue_values,
@@ -741,13 +916,10 @@ with tab1:
             
             with what_if_tabs[1]:
                 # Data usage impact analysis
-                data_values = np.linspace(float(min(col_info["DATA_VOLUME"])), float(max(col_info["DATA_VOLUME"])), 10)
-                data_probs = []
-                
-                for data_val in data_values:
-                    df_what_if = df.copy()
-                    df_what_if['DATA_VOLUME'] = scaler.transform([[data_val]])[0][0]  # Scale the new data value
-                    data_probs.append(model.predict_proba(df_what_if)[0][1])
+                data_values = np.linspace(float(np.min(col_info["DATA_VOLUME"])), float(np.max(col_info["DATA_VOLUME"])), 10)
+                X_what_if = np.repeat(x, len(data_values), axis=0)
+                X_what_if[:, encoder.position['DATA_VOLUME']] = encoder.scale('DATA_VOLUME', data_values)
+                data_probs = predict_proba(model, X_what_if)
                 
                 fig = px.line(
                     x=data_values,
@@ -761,13 +933,10 @@ with tab1:
             
             with what_if_tabs[2]:
                 # Competitor impact analysis
-                orange_values = np.linspace(float(min(col_info["ORANGE"])), float(max(col_info["ORANGE"])), 10)
-                orange_probs = []
-                
-                for orange_val in orange_values:
-                    df_what_if = df.copy()
-                    df_what_if['ORANGE'] = scaler.transform([[orange_val]])[0][0]  # Scale the new orange value
-                    orange_probs.append(model.predict_proba(df_what_if)[0][1])
+                orange_values = np.linspace(float(np.min(col_info["ORANGE"])), float(np.max(col_info["ORANGE"])), 10)
+                X_what_if = np.repeat(x, len(orange_values), axis=0)
+                X_what_if[:, encoder.position['ORANGE']] = encoder.scale('ORANGE', orange_values)
+                orange_probs = predict_proba(model, X_what_if)
                 
                 fig = px.line(
                     x=orange_values,
@@ -815,9 +984,311 @@ with tab1:
                 )
                 
                 st.markdown('</div>', unsafe_allow_html=True)
+    
+    # -----------------------
+    # Profile Comparison
+    # -----------------------
+    comparison = st.session_state.comparison
+    st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
+    st.markdown('<div class="card-header">Profile Comparison</div>', unsafe_allow_html=True)
+    st.markdown("Edit any cell to rescore that profile; the other profiles keep their scores.")
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        profile_name = st.text_input("Profile name", value=f"Custom {len(comparison) + 1}")
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.button("Save Last Prediction", disabled='last_customer_values' not in st.session_state):
+            comparison.add({profile_name: st.session_state.last_customer_values})
+    
+    if len(comparison):
+        edited_profiles = st.data_editor(
+            comparison.profiles,
+            use_container_width=True,
+            column_config={
+                "REGION": st.column_config.SelectboxColumn(options=list(vocabularies["REGION"].labels)),
+                "TENURE": st.column_config.SelectboxColumn(options=list(vocabularies["TENURE"].labels)),
+                "TOP_PACK": st.column_config.SelectboxColumn(options=list(vocabularies["TOP_PACK"].labels)),
+            }
+        )
+        comparison.update(edited_profiles)
+        
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            baseline = st.selectbox("Compare against", list(comparison.profiles.index))
+        with col2:
+            removed = st.multiselect("Remove profiles", list(comparison.profiles.index))
+            if removed and st.button("Remove"):
+                comparison.remove(removed)
+                st.rerun()
+        
+        comparison_table = comparison.table(baseline, (high_risk, medium_risk))
+        baseline_prob = comparison_table.at[baseline, "CHURN_PROBABILITY"]
+        # Side-by-side gauges, four per row, each showing its change against the baseline
+        names = list(comparison_table.index)
+        for start in range(0, len(names), 4):
+            gauge_cols = st.columns(4)
+            for gauge_col, name in zip(gauge_cols, names[start:start + 4]):
+                with gauge_col:
+                    fig = go.Figure(go.Indicator(
+                        mode = "gauge+number+delta",
+                        value = comparison_table.at[name, "CHURN_PROBABILITY"] * 100,
+                        delta = {'reference': baseline_prob * 100, 'increasing': {'color': "#F44336"}, 'decreasing': {'color': "#4CAF50"}},
+                        title = {'text': name},
+                        gauge = {
+                            'axis': {'range': [0, 100]},
+                            'bar': {'color': current_theme["primary"]},
+                            'steps': [
+                                {'range': [0, medium_risk * 100], 'color': "#E8F5E9"},
+                                {'range': [medium_risk * 100, high_risk * 100], 'color': "#FFF8E1"},
+                                {'range': [high_risk * 100, 100], 'color': "#FFEBEE"}
+                            ]
+                        }
+                    ))
+                    fig.update_layout(height=220, margin=dict(l=20, r=20, t=50, b=10))
+                    st.plotly_chart(fig, use_container_width=True)
+        
+        st.dataframe(
+            comparison_table.style.format({"CHURN_PROBABILITY": "{:.2%}", "DELTA": "{:+.2%}"}),
+            use_container_width=True
+        )
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+with tab_batch:
+    st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
+    st.markdown('<div class="card-header">Batch Scoring</div>', unsafe_allow_html=True)
+    
+    st.markdown("Upload a CSV, Parquet or Arrow file of subscribers with the same columns as the prediction form to score them all at once. Parquet and Arrow files are read column by column, so only the columns the model needs are loaded.")
+    
+    uploaded_file = st.file_uploader("Subscriber file", type=["csv", "parquet", "arrow", "feather"])
+    top_k = st.slider("Churn drivers per subscriber", min_value=1, max_value=5, value=3)
+    single_precision = st.checkbox(
+        "Single precision (float32)",
+        help="Halves the feature matrix for very large files; probabilities stay within 1e-5 of full precision"
+    )
+    
+    reject_invalid = st.checkbox(
+        "Drop invalid rows",
+        help="Skip subscribers with unknown categories or values outside the training range instead of only reporting them"
+    )
+    
+    if uploaded_file is not None and st.button("Score File"):
+        # The previous file's results and report are dropped first, so a file that
+        # fails never shows next to them
+        st.session_state.batch_results = None
+        st.session_state.batch_rollup = None
+        st.session_state.batch_key = None
+        st.session_state.batch_results_key = None
+        st.session_state.batch_validation = None
+        st.session_state.batch_cache = SessionCache()
+        with st.spinner('Scoring subscribers...'):
+            # Validated and scored chunk by chunk; checks, reason codes and segment
+            # rollups are computed for the whole chunk at once
+            validator = UploadValidator(col_info, vocabularies, reject=REJECT_CHECKS if reject_invalid else ())
+            rollup = SegmentRollup(vocabularies)
+            scored_chunks = []
+            try:
+                chunks = validated(read_chunks(uploaded_file, name=uploaded_file.name), validator)
+                for scored in score_chunks(chunks, model, encoder, top_k=top_k,
+                                           dtype=np.float32 if single_precision else np.float64):
+                    rollup.update(scored)
+                    drift_monitor.update(scored)
+                    trend_monitor.update(scored["CHURN_PROBABILITY"], high_risk)
+                    scored_chunks.append(scored)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.session_state.batch_results = pd.concat(scored_chunks, ignore_index=True)
+                st.session_state.batch_rollup = rollup
+                st.session_state.batch_key = file_hash(uploaded_file.getvalue())
+                # Identifies these results (file and scoring options) for the feature-effect cache
+                st.session_state.batch_results_key = cache_key(
+                    "batch_results", current_version, st.session_state.batch_key, top_k, single_precision, reject_invalid
+                )
+                st.session_state.batch_validation = {
+                    "rows": validator.rows,
+                    "rejected": validator.rejected,
+                    "report": validator.report(),
+                }
+                # Capped now rather than at the end of the run, which st.rerun() can cut short
+                enforce_budget(st.session_state, session_id, shared=(model, encoder, vocabularies))
+    
+    batch_validation = st.session_state.batch_validation
+    if batch_validation is not None:
+        report = batch_validation["report"]
+        if report.empty:
+            st.success(f"All {batch_validation['rows']:,} rows passed validation.")
+        else:
+            st.warning(
+                f"{len(report)} validation issue(s) in {batch_validation['rows']:,} rows; "
+                f"{batch_validation['rejected']:,} rows dropped."
+            )
+            with st.expander("Validation Report"):
+                st.markdown("Checked against the training data: missing values, categories the model has never seen, and numeric values outside the training range. Row numbers count data rows from 1.")
+                st.dataframe(report.style.format({"SHARE": "{:.2%}"}), use_container_width=True)
+    
+    if st.session_state.batch_results is not None:
+        batch_cache = st.session_state.batch_cache
+        
+        @functools.lru_cache(maxsize=None)
+        def batch_frame():
+            # A spilled frame is read back at most once per run, and only when a
+            # result below is not in the batch cache yet
+            return load_frame(st.session_state.batch_results)
+        
+        def summarize_batch():
+            frame = batch_frame()
+            return {
+                "rows": len(frame),
+                "high": int((frame["RISK_LEVEL"] == "High").sum()),
+                "mean": float(frame["CHURN_PROBABILITY"].mean()),
+                "preview": frame.head(1000),
+            }
+        
+        batch_summary = batch_cache.get("summary", summarize_batch)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Subscribers Scored", f"{batch_summary['rows']:,}")
+        with col2:
+            st.metric("High Risk", f"{batch_summary['high']:,}")
+        with col3:
+            st.metric("Average Churn Probability", f"{batch_summary['mean']:.2%}")
+        
+        st.dataframe(batch_summary["preview"], use_container_width=True)
+        
+        # Counterfactual offers for every at-risk subscriber, solved for the whole file at once
+        with st.expander("Retention Offers"):
+            offer_target = st.slider(
+                "Bring churn probability below",
+                min_value=0.01, max_value=0.99, value=float(medium_risk), step=0.01
+            )
+            
+            def find_offers():
+                frame = batch_frame()
+                at_risk = frame[frame["CHURN_PROBABILITY"] >= offer_target]
+                return pd.concat([at_risk, counterfactual_search.search(at_risk, offer_target)], axis=1)
+            
+            def summarize_offers():
+                # Searched once per scored file and target; only the summary is kept
+                at_risk = batch_frame()["CHURN_PROBABILITY"] >= offer_target
+                if not at_risk.any():
+                    return None
+                offers = find_offers()
+                return {
+                    "rows": len(offers),
+                    "feasible": float(offers["FEASIBLE"].mean()),
+                    "lever_counts": offers["PRIMARY_LEVER"].value_counts(),
+                    "preview": offers.head(1000),
+                }
+            
+            offer_summary = batch_cache.get(("offers", offer_target), summarize_offers)
+            if offer_summary is None:
+                st.info("No scored subscriber is at or above this probability.")
+            else:
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("Subscribers Above Target", f"{offer_summary['rows']:,}")
+                with col2:
+                    st.metric("Reachable Within Ranges", f"{offer_summary['feasible']:.1%}")
+                lever_counts = offer_summary["lever_counts"]
+                fig = px.bar(
+                    x=lever_counts.index.astype(str),
+                    y=lever_counts.values,
+                    labels={'x': 'Primary lever', 'y': 'Subscribers'},
+                    title='Main Change Needed per Subscriber',
+                    color_discrete_sequence=[current_theme["primary"]]
+                )
+                st.plotly_chart(fig, use_container_width=True)
+                st.dataframe(offer_summary["preview"], use_container_width=True)
+                prepared_download(
+                    "Offers", ("offers_csv", offer_target),
+                    lambda: find_offers().to_csv(index=False).encode("utf-8"),
+                    "retention_offers.csv", "text/csv"
+                )
+        
+        # Budget-constrained targeting by expected saved value
+        with st.expander("Retention Targeting"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                target_budget = st.number_input("Budget", min_value=0.0, value=1_000_000.0, step=50_000.0)
+            with col2:
+                contact_cost = st.number_input("Cost per contact", min_value=0.0, value=DEFAULT_COST, step=50.0)
+            with col3:
+                offer_uplift = st.slider("Offer uplift (share of churners retained)", 0.0, 1.0, DEFAULT_UPLIFT, 0.05)
+            region_caps = st.data_editor(
+                pd.DataFrame({"REGION": vocabularies["REGION"].labels, "MAX_CONTACTS": None}).astype({"MAX_CONTACTS": "Int64"}),
+                column_config={"MAX_CONTACTS": st.column_config.NumberColumn(min_value=0, help="Leave empty for no cap")},
+                disabled=["REGION"],
+                hide_index=True,
+                use_container_width=True
+            )
+            region_caps = region_caps.dropna(subset=["MAX_CONTACTS"])
+            region_caps = dict(zip(region_caps["REGION"], region_caps["MAX_CONTACTS"].astype(int).tolist()))
+            
+            def select_targets():
+                selector = TargetSelector(target_budget, contact_cost, offer_uplift, region_caps)
+                selector.update(batch_frame())
+                return selector
+            
+            def summarize_targets():
+                # Selected once per scored file and settings; only the summary is kept
+                selector = select_targets()
+                targets = selector.targets()
+                return {
+                    "summary": selector.summary(),
+                    "cumulative_cost": targets["CUMULATIVE_COST"].to_numpy(),
+                    "cumulative_value": targets["CUMULATIVE_VALUE"].to_numpy(),
+                    "preview": targets.head(1000),
+                }
+            
+            targeting_key = (target_budget, contact_cost, offer_uplift, tuple(sorted(region_caps.items())))
+            targeting = batch_cache.get(("targets",) + targeting_key, summarize_targets)
+            summary = targeting["summary"]
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Subscribers to Contact", f"{summary['contacts']:,}")
+            with col2:
+                st.metric("Spend", f"{summary['spend']:,.0f}")
+            with col3:
+                st.metric("Expected Saved Revenue", f"{summary['expected_saved_value']:,.0f}")
+            with col4:
+                st.metric("Return on Spend", f"{summary['roi']:.0%}")
+            
+            if len(targeting["preview"]):
+                fig = px.line(
+                    x=targeting["cumulative_cost"],
+                    y=targeting["cumulative_value"],
+                    labels={'x': 'Cumulative spend', 'y': 'Expected saved revenue'},
+                    title='Expected Saved Revenue vs. Spend'
+                )
+                fig.update_traces(line_color=current_theme["primary"], line_width=3)
+                st.plotly_chart(fig, use_container_width=True)
+                st.dataframe(targeting["preview"], use_container_width=True)
+                prepared_download(
+                    "Target List", ("targets_csv",) + targeting_key,
+                    lambda: select_targets().targets().to_csv(index=False).encode("utf-8"),
+                    "retention_targets.csv", "text/csv"
+                )
+        col1, col2 = st.columns(2)
+        with col1:
+            prepared_download(
+                "Scored File (CSV)", "scored_csv",
+                lambda: batch_frame().to_csv(index=False).encode("utf-8"),
+                "scored_subscribers.csv", "text/csv"
+            )
+        with col2:
+            prepared_download(
+                "Scored File (Parquet)", "scored_parquet",
+                lambda: parquet_bytes(batch_frame()),
+                "scored_subscribers.parquet", "application/octet-stream"
+            )
+    
+    st.markdown('</div>', unsafe_allow_html=True)
 
 with tab2:
-    data_tabs = st.tabs(["Customer Segments", "Regional Analysis", "Temporal Trends", "Usage Patterns"])
+    data_tabs = st.tabs(["Customer Segments", "Regional Analysis", "Temporal Trends", "Usage Patterns", "Feature Drift", "Feature Effects"])
     
     with data_tabs[0]:
         st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
@@ -849,52 +1320,49 @@ with tab2:
             st.markdown('<div class="metric-label">High-Value User Churn</div>', unsafe_allow_html=True)
             st.markdown('</div>', unsafe_allow_html=True)
         
+        batch_rollup = st.session_state.batch_rollup
+        if batch_rollup is not None:
+            # Rollups of the last scored file
+            st.markdown("### Scored Subscribers by Segment")
+            segment_by = st.multiselect(
+                "Break down by",
+                ["REGION", "TENURE", "TOP_PACK"],
+                default=["TENURE"]
+            )
+            segment_table = batch_rollup.table(segment_by)
+            if segment_by:
+                segment_labels = segment_table[segment_by].astype(str).agg(" / ".join, axis=1)
+                fig = go.Figure(data=[
+                    go.Bar(name='High Risk', x=segment_labels, y=segment_table['HIGH_RISK'], marker_color='#F44336'),
+                    go.Bar(name='Medium Risk', x=segment_labels, y=segment_table['MEDIUM_RISK'], marker_color='#FFC107'),
+                    go.Bar(name='Low Risk', x=segment_labels, y=segment_table['LOW_RISK'], marker_color='#4CAF50')
+                ])
+                fig.update_layout(
+                    barmode='stack',
+                    title='Scored Subscribers by Segment and Churn Risk',
+                    xaxis_title=' / '.join(segment_by),
+                    yaxis_title='Subscribers',
+                    legend_title='Risk Level',
+                    height=400
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(
+                segment_table.sort_values("MEAN_CHURN_PROBABILITY", ascending=False),
+                use_container_width=True
+            )
+        else:
+            st.info("Score a file in the Batch Scoring tab to break the results down by segment.")
+        
         # Customer segments visualization
         st.markdown("### Customer Segments by Churn Risk")
         
-        # Sample data for customer segments
-        segments = ['New Users', 'Low Usage', 'Medium Usage', 'High Usage', 'Premium']
-        high_risk = [42, 28, 18, 15, 12]
-        medium_risk = [35, 40, 45, 30, 25]
-        low_risk = [23, 32, 37, 55, 63]
-        
-        # Create a stacked bar chart
-        fig = go.Figure(data=[
-            go.Bar(name='High Risk', x=segments, y=high_risk, marker_color='#F44336'),
-            go.Bar(name='Medium Risk', x=segments, y=medium_risk, marker_color='#FFC107'),
-            go.Bar(name='Low Risk', x=segments, y=low_risk, marker_color='#4CAF50')
-        ])
-        
-        fig.update_layout(
-            barmode='stack',
-            title='Customer Segments by Churn Risk',
-            xaxis_title='Customer Segment',
-            yaxis_title='Percentage',
-            legend_title='Risk Level',
-            height=400
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        # Sample data for customer segments, built once per process
+        static_figures = load_static_figures()
+        st.plotly_chart(static_figures["segments"], use_container_width=True)
         
         # Churn reasons
         st.markdown("### Primary Reasons for Churn")
-        
-        # Sample data for churn reasons
-        reasons = ['Price', 'Competitor Offers', 'Service Quality', 'Network Coverage', 'Customer Service', 'Other']
-        percentages = [35, 25, 15, 12, 8, 5]
-        
-        # Create a pie chart
-        fig = px.pie(
-            values=percentages,
-            names=reasons,
-            title='Primary Reasons for Churn',
-            color_discrete_sequence=px.colors.sequential.Oranges
-        )
-        
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        fig.update_layout(height=400)
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(static_figures["reasons"], use_container_width=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -902,6 +1370,24 @@ with tab2:
         st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
         st.markdown('<div class="card-header">Regional Analysis</div>', unsafe_allow_html=True)
         
+        if st.session_state.batch_rollup is not None:
+            # Mean churn probability of the last scored file by region and tenure
+            st.markdown("### Scored Churn Probability by Region and Tenure")
+            region_tenure = st.session_state.batch_rollup.table(["REGION", "TENURE"]).pivot(
+                index="REGION", columns="TENURE", values="MEAN_CHURN_PROBABILITY"
+            )
+            fig = px.imshow(
+                region_tenure.values,
+                labels=dict(x="Tenure", y="Region", color="Mean Churn Probability"),
+                x=list(region_tenure.columns),
+                y=list(region_tenure.index),
+                color_continuous_scale='Oranges',
+                text_auto='.1%'
+            )
+            fig.update_layout(height=500)
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(st.session_state.batch_rollup.table(["REGION"]), use_container_width=True)
+        
         # Regional churn heatmap
         st.markdown("### Churn Rate by Region")
         
@@ -936,40 +1422,28 @@ with tab2:
         # Regional map visualization
         st.markdown("### Geographic Distribution of Churn")
         
-        # For a real implementation, you would use actual map data for Senegal/Mauritania
-        # This is a placeholder visualization
-        st.markdown("""
-        *Note: This is a placeholder for a geographic map visualization. In a production environment, 
-        you would implement an actual map of Senegal and Mauritania with regional churn data.*
-        """)
-        
-        # Create a sample scatter geo plot
-        fig = px.scatter_geo(
-            region_df,
-            lat=[14.7, 14.8, 16.0, 14.6, 14.1, 12.6, 15.6, 14.3, 12.9],  # Sample coordinates
-            lon=[-17.4, -16.9, -16.5, -16.2, -16.1, -16.3, -16.2, -16.4, -14.9],  # Sample coordinates
-            size=region_df['Overall Churn'] * 100,
-            color=region_df['Overall Churn'],
-            hover_name='Region',
-            color_continuous_scale='Oranges',
-            size_max=30,
-            title='Churn Rate by Geographic Location'
-        )
-        
-        fig.update_geos(
-            projection_type="natural earth",
-            showcoastlines=True,
-            coastlinecolor="Black",
-            showland=True,
-            landcolor="LightGreen",
-            showocean=True,
-            oceancolor="LightBlue",
-            showlakes=True,
-            lakecolor="Blue"
-        )
-        
-        fig.update_layout(height=500)
-        st.plotly_chart(fig, use_container_width=True)
+        if st.session_state.batch_rollup is None:
+            st.info("Score a file in the Batch Scoring tab to map churn risk by region.")
+        else:
+            # Aggregated per region on the server; the browser only receives one point per region
+            region_points = st.session_state.batch_rollup.region_points()
+            st.pydeck_chart(pdk.Deck(
+                layers=[pdk.Layer(
+                    "ScatterplotLayer",
+                    data=region_points,
+                    get_position=["LON", "LAT"],
+                    get_radius="RADIUS",
+                    get_fill_color="COLOR",
+                    pickable=True,
+                    stroked=True,
+                    get_line_color=[120, 60, 0],
+                    line_width_min_pixels=1
+                )],
+                initial_view_state=pdk.ViewState(latitude=14.4, longitude=-14.9, zoom=5.6),
+                tooltip={"text": "{TOOLTIP}"},
+                map_style=None
+            ))
+            st.caption("Circle area: subscribers scored. Colour: mean churn probability, from lowest (pale) to highest (deep orange) region.")
         
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -980,22 +1454,51 @@ with tab2:
         # Time series analysis
         st.markdown("### Churn Rate Over Time")
         
-        # Generate sample time series data
-        dates = pd.date_range(start='2022-01-01', end='2023-12-31', freq='M')
-        churn_rates = [0.22 + 0.05 * np.sin(i/3) + np.random.uniform(-0.03, 0.03) for i in range(len(dates))]
+        # Hourly and daily rollups of every prediction since the server started,
+        # maintained as scores arrive
+        resolution = st.radio("Resolution", ["Hourly", "Daily"], horizontal=True)
+        trend = trend_monitor.frame(resolution)
         
-        # Create a time series plot
-        fig = px.line(
-            x=dates,
-            y=churn_rates,
-            labels={'x': 'Date', 'y': 'Churn Rate'},
-            title='Monthly Churn Rate Trend',
-            markers=True
-        )
-        
-        fig.update_traces(line_color=current_theme["primary"], line_width=3)
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        if trend.empty:
+            st.info("No predictions have been made yet; trends appear as subscribers are scored.")
+        else:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Subscribers Scored", f"{int(trend['SUBSCRIBERS'].sum()):,}")
+            with col2:
+                st.metric(f"Mean Churn Probability (latest {'hour' if resolution == 'Hourly' else 'day'})",
+                          f"{trend['MEAN_CHURN_PROBABILITY'].iloc[-1]:.2%}")
+            with col3:
+                st.metric("High-Risk Share (latest)", f"{trend['HIGH_RISK_SHARE'].iloc[-1]:.2%}")
+            
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=trend["TIME"], y=trend["MEAN_CHURN_PROBABILITY"], name='Mean churn probability',
+                mode='lines+markers', line=dict(color=current_theme["primary"], width=3)
+            ))
+            fig.add_trace(go.Scatter(
+                x=trend["TIME"], y=trend["HIGH_RISK_SHARE"], name='High-risk share',
+                mode='lines+markers', line=dict(color="#F44336", width=2, dash='dot')
+            ))
+            fig.update_layout(
+                title=f'{resolution} Churn Trend',
+                xaxis_title='Time',
+                yaxis_title='Share of Scored Subscribers',
+                yaxis_tickformat='.0%',
+                height=400
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            
+            fig = px.bar(
+                trend,
+                x="TIME",
+                y="SUBSCRIBERS",
+                labels={'TIME': 'Time', 'SUBSCRIBERS': 'Subscribers Scored'},
+                title=f'{resolution} Scoring Volume',
+                color_discrete_sequence=[current_theme["secondary"]]
+            )
+            fig.update_layout(height=300)
+            st.plotly_chart(fig, use_container_width=True)
         
         # Seasonal patterns
         st.markdown("### Seasonal Patterns in Churn")
@@ -1065,8 +1568,8 @@ with tab2:
         # Generate sample data
         np.random.seed(42)
         n_samples = 200
-        data_volume = np.random.uniform(low=float(min(col_info["DATA_VOLUME"])), high=float(max(col_info["DATA_VOLUME"])), size=n_samples)
-        revenue = np.random.uniform(low=float(min(col_info["REVENUE"])), high=float(max(col_info["REVENUE"])), size=n_samples)
+        data_volume = np.random.uniform(low=float(np.min(col_info["DATA_VOLUME"])), high=float(np.max(col_info["DATA_VOLUME"])), size=n_samples)
+        revenue = np.random.uniform(low=float(np.min(col_info["REVENUE"])), high=float(np.max(col_info["REVENUE"])), size=n_samples)
         churn_prob = 0.5 - 0.3 * (data_volume / max(data_volume)) - 0.2 * (revenue / max(revenue)) + np.random.normal(0, 0.1, n_samples)
         churn_prob = np.clip(churn_prob, 0, 1)
         
@@ -1075,7 +1578,7 @@ with tab2:
             'Data Volume': data_volume,
             'Revenue': revenue,
             'Churn Probability': churn_prob,
-            'Risk Level': ['High' if p > 0.7 else 'Medium' if p > 0.3 else 'Low' for p in churn_prob]
+            'Risk Level': np.asarray(risk_level(churn_prob, high_risk, medium_risk))
         })
         
         fig = px.scatter(
@@ -1168,6 +1671,129 @@ with tab2:
         st.plotly_chart(fig, use_container_width=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
+    
+    with data_tabs[4]:
+        st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
+        st.markdown('<div class="card-header">Feature Drift</div>', unsafe_allow_html=True)
+        
+        st.markdown("Compares every subscriber scored since the server started (batch files and single predictions) against the training-time reference distribution.")
+        
+        if drift_monitor.rows == 0:
+            st.info("No subscribers have been scored yet.")
+        else:
+            drift_report = drift_monitor.report()
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Subscribers Monitored", f"{drift_monitor.rows:,}")
+            with col2:
+                st.metric("Features with Major Shift", int((drift_report["STATUS"] == "Major shift").sum()))
+            with col3:
+                st.metric("Features with Moderate Shift", int((drift_report["STATUS"] == "Moderate shift").sum()))
+            
+            # PSI per feature
+            fig = px.bar(
+                drift_report,
+                x="PSI",
+                y="FEATURE",
+                orientation='h',
+                color="STATUS",
+                color_discrete_map={'Major shift': '#F44336', 'Moderate shift': '#FFC107', 'Stable': '#4CAF50'},
+                labels={'PSI': 'Population Stability Index', 'FEATURE': 'Feature'},
+                title='Population Stability Index by Feature'
+            )
+            fig.update_layout(height=500, yaxis={'categoryorder': 'total ascending'})
+            st.plotly_chart(fig, use_container_width=True)
+            
+            st.dataframe(drift_report, use_container_width=True)
+            
+            # Reference vs. current distribution of one feature
+            drift_feature = st.selectbox("Compare distribution", drift_report["FEATURE"])
+            histogram = drift_monitor.histogram(drift_feature)
+            fig = go.Figure(data=[
+                go.Bar(name='Training Reference', x=histogram['BIN'], y=histogram['REFERENCE'], marker_color=current_theme["secondary"]),
+                go.Bar(name='Scored Subscribers', x=histogram['BIN'], y=histogram['CURRENT'], marker_color=current_theme["primary"])
+            ])
+            fig.update_layout(
+                barmode='group',
+                title=f'{drift_feature}: Reference vs. Scored Distribution',
+                yaxis_title='Share of Subscribers',
+                yaxis_tickformat='.0%',
+                height=400
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with data_tabs[5]:
+        st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
+        st.markdown('<div class="card-header">Feature Effects</div>', unsafe_allow_html=True)
+        
+        st.markdown("How churn probability responds to one feature across a whole population: the partial-dependence curve is the average over every subscriber, the thin lines are individual (ICE) curves for a random sample.")
+        
+        effect_sources = []
+        if st.session_state.batch_results is not None:
+            effect_sources.append("Last scored file")
+        if os.path.exists(HOLDOUT_PATH):
+            effect_sources.append("Holdout file")
+        
+        if not effect_sources:
+            st.info(f"Score a file in the Batch Scoring tab (or place a holdout file at `{HOLDOUT_PATH}`) to compute feature effects.")
+        else:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                effect_source = st.selectbox("Population", effect_sources)
+            with col2:
+                effect_feature = st.selectbox(
+                    "Feature",
+                    NUM_COLS_TO_SCALE + CATEGORICAL_COLUMNS,
+                    index=NUM_COLS_TO_SCALE.index("DATA_VOLUME")
+                )
+            with col3:
+                n_ice = st.slider("ICE curves", min_value=0, max_value=200, value=50, step=10)
+            effect_precision = "float32" if st.checkbox(
+                "Single precision (float32)",
+                key="effects_float32",
+                help="Halves the feature matrix for very large populations; curves stay within 1e-5 of full precision"
+            ) else "float64"
+            
+            if effect_source == "Last scored file":
+                # Covers the scoring options too: dropping invalid rows changes the population
+                effect_key = st.session_state.batch_results_key
+                effect_frames = lambda: frame_chunks(load_frame(st.session_state.batch_results))
+            else:
+                holdout_stat = os.stat(HOLDOUT_PATH)
+                effect_key = load_file_hash(HOLDOUT_PATH, holdout_stat.st_mtime_ns, holdout_stat.st_size)
+                effect_frames = lambda: pd.read_csv(HOLDOUT_PATH, chunksize=200_000)
+            
+            with st.spinner('Computing feature effects...'):
+                curves = load_dependence(current_version, effect_key, effect_feature, n_ice, effect_precision,
+                                         effect_frames)
+            
+            curve_data = curves_frame(curves, effect_feature)
+            ice_data = curve_data[curve_data["CURVE"] != "Partial dependence"]
+            pd_data = curve_data[curve_data["CURVE"] == "Partial dependence"]
+            fig = go.Figure()
+            for _, curve in ice_data.groupby("CURVE", sort=False):
+                fig.add_trace(go.Scatter(
+                    x=curve[effect_feature], y=curve["CHURN_PROBABILITY"], mode='lines',
+                    line=dict(color=current_theme["secondary"], width=1), opacity=0.3,
+                    hoverinfo='skip', showlegend=False
+                ))
+            fig.add_trace(go.Scatter(
+                x=pd_data[effect_feature], y=pd_data["CHURN_PROBABILITY"], mode='lines+markers',
+                line=dict(color=current_theme["primary"], width=4), name='Partial dependence'
+            ))
+            fig.update_layout(
+                title=f'Churn Probability vs. {effect_feature} ({curves["rows"]:,} subscribers)',
+                xaxis_title=effect_feature,
+                yaxis_title='Churn Probability',
+                yaxis_tickformat='.0%',
+                height=450
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        
+        st.markdown('</div>', unsafe_allow_html=True)
 
 with tab3:
     media_tabs = st.tabs(["Educational Videos", "Infographics", "Case Studies"])
@@ -1363,7 +1989,7 @@ with tab4:
     st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
     st.markdown('<div class="card-header">About the Model</div>', unsafe_allow_html=True)
     
-    st.markdown("""
+    st.markdown(f"""
     ### Model Information
     
     This churn prediction model was developed using machine learning techniques to analyze customer behavior patterns and predict the likelihood of customers leaving Expresso's services.
@@ -1384,65 +2010,145 @@ with tab4:
     
     ### How to Use the Predictions
     
-    - **High Risk (>70%)**: These customers require immediate attention and personalized retention offers
-    - **Medium Risk (30-70%)**: Proactive engagement can help retain these customers
-    - **Low Risk (<30%)**: Continue providing excellent service and look for upsell opportunities
+    - **High Risk (≥{high_risk:.0%})**: These customers require immediate attention and personalized retention offers
+    - **Medium Risk ({medium_risk:.0%}-{high_risk:.0%})**: Proactive engagement can help retain these customers
+    - **Low Risk (<{medium_risk:.0%})**: Continue providing excellent service and look for upsell opportunities
     """)
     
     # Model performance metrics
     st.markdown("### Model Performance Metrics")
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.markdown('<div class="metric-value">85.7%</div>', unsafe_allow_html=True)
-        st.markdown('<div class="metric-label">Accuracy</div>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+    holdout_file = st.file_uploader("Labeled holdout file (CSV with a CHURN column)", type=["csv"], key="holdout_file")
+    holdout_bytes = None
+    if holdout_file is not None:
+        holdout_bytes = holdout_file.getvalue()
+    elif os.path.exists(HOLDOUT_PATH):
+        with open(HOLDOUT_PATH, "rb") as f:
+            holdout_bytes = f.read()
     
-    with col2:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.markdown('<div class="metric-value">83.2%</div>', unsafe_allow_html=True)
-        st.markdown('<div class="metric-label">Precision</div>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.markdown('<div class="metric-value">79.5%</div>', unsafe_allow_html=True)
-        st.markdown('<div class="metric-label">Recall</div>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.markdown('<div class="metric-value">81.3%</div>', unsafe_allow_html=True)
-        st.markdown('<div class="metric-label">F1 Score</div>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    # ROC curve
-    st.markdown("### Model ROC Curve")
-    
-    # Generate sample ROC curve data
-    fpr = np.linspace(0, 1, 100)
-    tpr = np.power(fpr, 0.5)  # Simple curve shape for demonstration
-    
-    # Create ROC curve
-    fig = px.line(
-        x=fpr,
-        y=tpr,
-        labels={'x': 'False Positive Rate', 'y': 'True Positive Rate'},
-        title='ROC Curve (AUC = 0.857)'
-    )
-    
-    # Add diagonal line
-    fig.add_shape(
-        type='line',
-        line=dict(dash='dash', color='gray'),
-        x0=0, x1=1, y0=0, y1=1
-    )
-    
-    fig.update_traces(line_color=current_theme["primary"], line_width=3)
-    fig.update_layout(height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    if holdout_bytes is None:
+        st.info(f"Upload a labeled holdout file (or place one at `{HOLDOUT_PATH}`) to evaluate the model.")
+    else:
+        with st.spinner('Evaluating model on holdout...'):
+            evaluation = load_evaluation(current_version, file_hash(holdout_bytes), holdout_bytes)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        for col, label, value in [(col1, "Accuracy", evaluation["accuracy"]),
+                                  (col2, "Precision", evaluation["precision"]),
+                                  (col3, "Recall", evaluation["recall"]),
+                                  (col4, "F1 Score", evaluation["f1"])]:
+            with col:
+                st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+                st.markdown(f'<div class="metric-value">{value:.1%}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="metric-label">{label}</div>', unsafe_allow_html=True)
+                st.markdown('</div>', unsafe_allow_html=True)
+        
+        st.caption(f"Evaluated on {evaluation['n']:,} holdout subscribers ({evaluation['positives']:,} churners) at a 50% threshold.")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # ROC curve
+            fig = px.line(
+                evaluation["roc"],
+                x="fpr",
+                y="tpr",
+                labels={'fpr': 'False Positive Rate', 'tpr': 'True Positive Rate'},
+                title=f'ROC Curve (AUC = {evaluation["auc"]:.3f})'
+            )
+            
+            # Add diagonal line
+            fig.add_shape(
+                type='line',
+                line=dict(dash='dash', color='gray'),
+                x0=0, x1=1, y0=0, y1=1
+            )
+            
+            fig.update_traces(line_color=current_theme["primary"], line_width=3)
+            fig.update_layout(height=400)
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            # Precision-recall curve
+            fig = px.line(
+                evaluation["pr"],
+                x="recall",
+                y="precision",
+                labels={'recall': 'Recall', 'precision': 'Precision'},
+                title=f'Precision-Recall Curve (AP = {evaluation["average_precision"]:.3f})'
+            )
+            fig.update_traces(line_color=current_theme["primary"], line_width=3)
+            fig.update_layout(height=400)
+            st.plotly_chart(fig, use_container_width=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            fig = px.imshow(
+                evaluation["confusion_matrix"],
+                labels=dict(x="Predicted", y="Actual", color="Subscribers"),
+                x=['No Churn', 'Churn'],
+                y=['No Churn', 'Churn'],
+                color_continuous_scale='Oranges',
+                text_auto=True,
+                title='Confusion Matrix'
+            )
+            fig.update_layout(height=400)
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            fig = px.bar(
+                evaluation["lift"],
+                x="population_share",
+                y="lift",
+                labels={'population_share': 'Top share of subscribers by churn probability', 'lift': 'Cumulative Lift'},
+                title='Lift Chart'
+            )
+            fig.update_traces(marker_color=current_theme["secondary"])
+            fig.update_layout(height=400, xaxis_tickformat='.0%')
+            st.plotly_chart(fig, use_container_width=True)
+        
+        # Cost-aware risk bands
+        st.markdown("### Risk Threshold Optimization")
+        st.markdown("Choose the High and Medium risk bands from the cost of acting on a customer versus the revenue lost when they churn.")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            offer_cost = st.number_input("Retention offer cost", min_value=0.0, value=2000.0, step=100.0)
+            offer_save_rate = st.slider("Churners saved by an offer", 0.0, 1.0, 0.4, 0.05)
+        with col2:
+            light_cost = st.number_input("Light-touch contact cost", min_value=0.0, value=200.0, step=50.0)
+            light_save_rate = st.slider("Churners saved by light touch", 0.0, 1.0, 0.1, 0.05)
+        with col3:
+            months_at_risk = st.number_input("Months of revenue lost per churner", min_value=1, value=3)
+        
+        scored_holdout = load_scored_holdout(current_version, file_hash(holdout_bytes), holdout_bytes)
+        sweep = sweep_cutoffs(
+            scored_holdout[LABEL_COLUMN].to_numpy(),
+            scored_holdout["CHURN_PROBABILITY"].to_numpy(),
+            scored_holdout["REVENUE"].to_numpy() * months_at_risk,
+            {"Retention offer": (offer_cost, offer_save_rate), "Light touch": (light_cost, light_save_rate)}
+        )
+        best_high, best_medium = optimal_bands(sweep, "Retention offer", "Light touch")
+        
+        fig = px.line(
+            sweep.iloc[np.unique(np.linspace(0, len(sweep) - 1, 2000).astype(int))],
+            x="threshold",
+            y=["Retention offer", "Light touch"],
+            labels={'threshold': 'Churn Probability Cut-off', 'value': 'Net Value', 'variable': 'Action'},
+            title='Net Value by Cut-off'
+        )
+        fig.add_vline(x=best_high, line_dash="dash", line_color="#F44336")
+        fig.add_vline(x=best_medium, line_dash="dash", line_color="#FFC107")
+        fig.update_layout(height=400)
+        st.plotly_chart(fig, use_container_width=True)
+        
+        st.markdown(f"Suggested bands: **High ≥ {best_high:.1%}**, **Medium ≥ {best_medium:.1%}** (currently High ≥ {high_risk:.1%}, Medium ≥ {medium_risk:.1%}).")
+        if st.button("Apply Suggested Bands"):
+            save_bands(best_high, best_medium, model_version=current_version,
+                       holdout=file_hash(holdout_bytes))
+            st.success("Risk bands updated for all scoring paths.")
+            st.rerun()
     
     # Team information
     st.markdown("### About the Team")
@@ -1457,6 +2163,12 @@ with tab4:
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+# Cap this session's memory now that the run has added its data, and report it server-wide
+session_sizes, session_actions = enforce_budget(st.session_state, session_id, shared=(model, encoder, vocabularies))
+session_registry.record(session_id, session_sizes)
+for action in session_actions:
+    st.toast(f"Session memory budget reached: {action}")
+
 # Footer with timestamp
 st.markdown('<div class="footer">', unsafe_allow_html=True)
 st.markdown(f'Last updated: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', unsafe_allow_html=True)
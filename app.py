@@ -1,12 +1,12 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import joblib
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
+from encoding import FeatureEncoder
+from scoring import predict_proba
 
 # Load saved model & references
 model = joblib.load("clf.joblib")
 col_info = joblib.load("unique_elements_dict2.joblib")  # Contains options like TENURE, REGION, TOP_PACK
+encoder = FeatureEncoder(model, col_info)  # Checks the model schema once at load
 
 # -----------------------
 # UI: User Input Form
@@ -40,8 +40,8 @@ if submitted:
         st.warning("Please select values for REGION, TENURE, and TOP_PACK.")
         st.stop()
 
-    # 1. Raw input to DataFrame
-    df = pd.DataFrame([{
+    # 1. Raw input straight into the model's feature row
+    x = encoder.encode_row({
         "REGION": REGION,
         "TENURE": TENURE,
         "MONTANT": MONTANT,
@@ -56,48 +56,13 @@ if submitted:
         "REGULARITY": REGULARITY,
         "TOP_PACK": TOP_PACK,
         "FREQ_TOP_PACK": FREQ_TOP_PACK
-    }])
-
-    # Frequency encode REGION using local value count (fallback option)
-    region_freq = df['REGION'].value_counts(normalize=False)
-    df['REGION_FE'] = df['REGION'].map(region_freq)
-
-    # Normalize REGION_FE
-    scaler_region = MinMaxScaler()
-    df['REGION_FE'] = scaler_region.fit_transform(df[['REGION_FE']])
-
-    # Ordinal encode TENURE
-    tenure_order = ['A < 1 month', 'B 1-3 month', 'C 3-6 month', 'D 6-9 month',
-                    'E 9-12 month', 'F 12-15 month', 'G 15-18 month', 'H 18-21 month',
-                    'I 21-24 month', 'J 24 month', 'K > 24 month']
-    df['TENURE_OE'] = df['TENURE'].astype(pd.CategoricalDtype(categories=tenure_order, ordered=True)).cat.codes
-
-    # Frequency encode TOP_PACK
-    top_pack_freq = df['TOP_PACK'].value_counts()
-    df['TOP_PACK_FE'] = df['TOP_PACK'].map(top_pack_freq)
-
-    # Normalize the frequency encoding to [0,1]
-    scaler = MinMaxScaler()
-    df['TOP_PACK_FE'] = scaler.fit_transform(df[['TOP_PACK_FE']])
-
-    # Drop original non-numeric columns
-    df.drop(columns=['REGION', 'TENURE', 'TOP_PACK'], inplace=True)
-
-    # Columns to scale
-    num_cols_to_scale = [
-        'MONTANT', 'FREQUENCE_RECH', 'REVENUE', 'ARPU_SEGMENT',
-        'FREQUENCE', 'DATA_VOLUME', 'ON_NET', 'ORANGE', 'TIGO',
-        'REGULARITY', 'FREQ_TOP_PACK'
-    ]
-
-    scaler = StandardScaler()
-    df[num_cols_to_scale] = scaler.fit_transform(df[num_cols_to_scale])
+    })
 
     # -----------------------
     # Predict & Display
     # -----------------------
-    prediction = model.predict(df)[0]
-    prob = model.predict_proba(df)[0][1]
+    prob = float(predict_proba(model, x)[0])
+    prediction = int(prob >= 0.5)
 
     st.success("✅ Churn" if prediction == 1 else "❌ Not Churn")
     st.info(f"📈 Churn Probability: {prob:.2%}")
@@ -0,0 +1,154 @@
+"""Column-projected Arrow/Parquet input and streaming Parquet output for batch scoring.
+
+Only the columns the model needs are read, record batches are streamed straight into
+the encoder, and REGION/TENURE/TOP_PACK stay dictionary-encoded: they reach pandas as
+categoricals whose (small) category lists are the only Python strings created.
+Scored chunks are written back the same way, one row group per chunk.
+"""
+import os
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from encoding import CATEGORICAL_COLUMNS, NUM_COLS_TO_SCALE, RAW_COLUMNS
+
+ARROW_EXTENSIONS = {".parquet": "parquet", ".pq": "parquet", ".arrow": "ipc", ".feather": "ipc", ".ipc": "ipc"}
+DEFAULT_BATCH_SIZE = 200_000
+PARTITION_COLUMNS = ["REGION", "RISK_LEVEL"]
+# Hive's directory name for rows whose partition value is missing
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def arrow_format(name):
+    """Dataset format for a file name, or None when it is not an Arrow/Parquet file."""
+    name = str(name).lower()
+    for extension, fmt in ARROW_EXTENSIONS.items():
+        if name.endswith(extension):
+            return fmt
+    return None
+
+
+def _dataset(source, fmt, extra_columns):
+    if fmt == "parquet":
+        # Ask the reader for dictionary arrays instead of decoding strings
+        fmt = ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(dictionary_columns=CATEGORICAL_COLUMNS))
+    if isinstance(source, str):
+        dataset = ds.dataset(source, format=fmt)
+        schema = dataset.schema
+    else:
+        # Uploaded buffers are read as a single fragment
+        if not isinstance(fmt, ds.FileFormat):
+            fmt = ds.IpcFileFormat()
+        dataset = fmt.make_fragment(pa.PythonFile(source, mode="r"))
+        schema = dataset.physical_schema
+    columns = [col for col in RAW_COLUMNS + list(extra_columns) if col in schema.names]
+    missing = sorted(set(RAW_COLUMNS) - set(columns))
+    if missing:
+        raise ValueError(f"Input is missing required columns: {missing}")
+    return dataset, columns
+
+
+def _to_frame(batch):
+    arrays = []
+    for name, array in zip(batch.schema.names, batch.columns):
+        if name in CATEGORICAL_COLUMNS and not pa.types.is_dictionary(array.type):
+            array = pc.dictionary_encode(array)
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, names=batch.schema.names).to_pandas()
+
+
+def iter_arrow_chunks(source, fmt="parquet", batch_size=DEFAULT_BATCH_SIZE, extra_columns=()):
+    """Yield DataFrames of the model's raw columns (plus ``extra_columns`` when present)."""
+    dataset, columns = _dataset(source, fmt, extra_columns)
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        if batch.num_rows:
+            yield _to_frame(batch)
+
+
+def _to_table(chunk):
+    """Arrow table of a scored chunk with a schema that does not vary between chunks."""
+    chunk = chunk.copy(deep=False)
+    for col in chunk.columns:
+        values = chunk[col]
+        if col in NUM_COLS_TO_SCALE:
+            # A chunk without missing values would otherwise come out as int64
+            chunk[col] = values.astype(np.float64)
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            # Ordered flags and index widths differ between chunks; Parquet keeps neither
+            chunk[col] = values.cat.as_unordered()
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    fields = [pa.field(f.name, pa.dictionary(pa.int32(), pa.string())) if pa.types.is_dictionary(f.type) else f
+              for f in table.schema]
+    return table.cast(pa.schema(fields))
+
+
+class ParquetResultWriter:
+    """Appends scored chunks to zstd-compressed, dictionary-encoded Parquet.
+
+    Without ``partition_by`` everything goes to one file (a path or a writable buffer).
+    With ``partition_by`` (REGION or RISK_LEVEL) ``destination`` is a directory laid
+    out Hive-style, ``REGION=DAKAR/part-0.parquet``, with one open file per partition
+    value. Each chunk becomes one row group, so only the current chunk is in memory.
+    """
+
+    def __init__(self, destination, partition_by=None, compression="zstd", compression_level=None):
+        if partition_by is not None and partition_by not in PARTITION_COLUMNS:
+            raise ValueError(f"partition_by must be one of {PARTITION_COLUMNS}, got {partition_by!r}")
+        self.destination = destination
+        self.partition_by = partition_by
+        self.options = {"compression": compression, "compression_level": compression_level, "use_dictionary": True}
+        self.schema = None
+        self.writers = {}
+        self.rows = 0
+
+    def _writer(self, key, schema):
+        if key not in self.writers:
+            if self.partition_by is None:
+                sink = self.destination
+            else:
+                directory = os.path.join(self.destination, f"{self.partition_by}={quote(key, safe='')}")
+                os.makedirs(directory, exist_ok=True)
+                sink = os.path.join(directory, "part-0.parquet")
+            self.writers[key] = pq.ParquetWriter(sink, schema, **self.options)
+        return self.writers[key]
+
+    def write(self, chunk):
+        """Append one scored DataFrame chunk."""
+        if not len(chunk):
+            return self
+        table = _to_table(chunk)
+        if self.schema is None:
+            self.schema = table.schema
+        table = table.cast(self.schema)
+        self.rows += len(chunk)
+        if self.partition_by is None:
+            self._writer(None, self.schema).write_table(table)
+            return self
+
+        # One stable sort by partition code, then contiguous slices per value
+        values = chunk[self.partition_by].astype("category")
+        codes = values.cat.codes.to_numpy()
+        order = np.argsort(codes, kind="stable")
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        table = table.drop_columns([self.partition_by]).take(order)
+        for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(order)]):
+            code = codes[order[start]]
+            key = NULL_PARTITION if code < 0 else str(values.cat.categories[code])
+            self._writer(key, table.schema).write_table(table.slice(start, stop - start))
+        return self
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
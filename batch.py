@@ -0,0 +1,163 @@
+"""Chunked batch scoring of subscriber files.
+
+Usage: python batch.py subscribers.{csv,parquet,arrow} scored.{csv,parquet} [--chunksize N] [--top-k K]
+                      [--partition-by REGION|RISK_LEVEL] [--float32] [--validate] [--reject-invalid]
+
+A destination other than a .csv file is written as zstd-compressed Parquet; with
+--partition-by it is a directory of Hive-style partitions. --float32 encodes and
+scores in single precision, halving the feature matrix (see bench_precision.py for
+the error bound). --validate checks every chunk against the training reference data
+(missing values, unknown categories, values outside the training range) and prints a
+report; --reject-invalid also drops rows with unknown categories or out-of-range values.
+"""
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from encoding import DERIVED_COLUMNS, FeatureEncoder
+from scoring import risk_level, score_with_contributions
+from thresholds import load_bands
+
+DEFAULT_CHUNKSIZE = 200_000
+TOP_K_REASONS = 3
+# Identifier and label columns carried through column-projected inputs
+PASSTHROUGH_COLUMNS = ["user_id", "CHURN"]
+
+
+def reason_names(encoder):
+    """Reason label for every model feature (derived features report their raw column)."""
+    return [DERIVED_COLUMNS.get(name, name) for name in encoder.feature_names]
+
+
+def top_k_reasons(contributions, k=TOP_K_REASONS):
+    """Feature indices of the k largest positive contributions per row, largest first.
+
+    Uses a partial sort over the whole chunk; slots without a positive contribution
+    are -1.
+    """
+    n_rows, n_features = contributions.shape
+    k = min(k, n_features)
+    top = np.argpartition(-contributions, k - 1, axis=1)[:, :k]
+    top_values = np.take_along_axis(contributions, top, axis=1)
+    order = np.argsort(-top_values, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    top_values = np.take_along_axis(top_values, order, axis=1)
+    top[top_values <= 0] = -1
+    return top
+
+
+def score_chunk(model, encoder, chunk, top_k=TOP_K_REASONS, X=None, bands=None):
+    """Score one chunk of raw rows and attach probability, risk level and reason codes.
+
+    ``bands`` is a (high, medium) pair; the persisted risk bands are used when omitted.
+    """
+    high, medium = bands or load_bands()
+    X = encoder.encode_frame(chunk, out=X)
+    probs, contributions, _ = score_with_contributions(model, X, encoder.feature_means)
+    scored = pd.DataFrame({
+        "CHURN_PROBABILITY": probs,
+        "RISK_LEVEL": risk_level(probs, high, medium),
+    }, index=chunk.index)
+    if top_k:
+        categories = reason_names(encoder)
+        reasons = top_k_reasons(contributions, top_k)
+        for i in range(reasons.shape[1]):
+            scored[f"REASON_{i + 1}"] = pd.Categorical.from_codes(reasons[:, i], categories=categories)
+    return pd.concat([chunk, scored], axis=1)
+
+
+def score_chunks(chunks, model, encoder, top_k=TOP_K_REASONS, bands=None, dtype=np.float64):
+    """Score an iterable of raw DataFrame chunks, reusing one feature buffer of ``dtype``."""
+    bands = bands or load_bands()
+    X = None
+    for chunk in chunks:
+        if X is None or X.shape[0] != len(chunk):
+            X = np.empty((len(chunk), encoder.n_features), dtype=dtype)
+        yield score_chunk(model, encoder, chunk, top_k=top_k, X=X, bands=bands)
+
+
+def score_csv(source, model, encoder, chunksize=DEFAULT_CHUNKSIZE, top_k=TOP_K_REASONS, bands=None,
+              dtype=np.float64):
+    """Yield scored chunks of a CSV file (path or buffer) without loading it whole."""
+    return score_chunks(pd.read_csv(source, chunksize=chunksize), model, encoder, top_k, bands, dtype)
+
+
+def read_chunks(source, name=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield raw DataFrame chunks of a CSV or Arrow/Parquet file, chosen by its name.
+
+    Arrow and Parquet inputs are read column-projected: only the model's columns and
+    PASSTHROUGH_COLUMNS are loaded.
+    """
+    name = name or getattr(source, "name", source)
+    if str(name).lower().endswith(".csv"):
+        return pd.read_csv(source, chunksize=chunksize)
+    from arrow_io import arrow_format, iter_arrow_chunks
+    fmt = arrow_format(name)
+    if fmt is None:
+        raise ValueError(f"Unsupported input file {name!r}; expected CSV, Parquet or Arrow")
+    return iter_arrow_chunks(source, fmt, batch_size=chunksize, extra_columns=PASSTHROUGH_COLUMNS)
+
+
+def score_file(source, model, encoder, name=None, chunksize=DEFAULT_CHUNKSIZE, top_k=TOP_K_REASONS, bands=None,
+               dtype=np.float64):
+    """Yield scored chunks of a CSV or Arrow/Parquet file."""
+    return score_chunks(read_chunks(source, name, chunksize), model, encoder, top_k, bands, dtype)
+
+
+def write_results(scored_chunks, destination, partition_by=None):
+    """Append scored chunks to a CSV file or Parquet output as they arrive; returns the row count."""
+    rows = 0
+    if str(destination).lower().endswith(".csv") and partition_by is None:
+        for i, scored in enumerate(scored_chunks):
+            scored.to_csv(destination, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            rows += len(scored)
+        return rows
+    from arrow_io import ParquetResultWriter
+    with ParquetResultWriter(destination, partition_by=partition_by) as writer:
+        for scored in scored_chunks:
+            writer.write(scored)
+        return writer.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a subscriber CSV, Parquet or Arrow file in chunks.")
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--top-k", type=int, default=TOP_K_REASONS)
+    parser.add_argument("--model", default="clf.joblib")
+    parser.add_argument("--col-info", default="unique_elements_dict2.joblib")
+    parser.add_argument("--partition-by", choices=["REGION", "RISK_LEVEL"], default=None)
+    parser.add_argument("--float32", action="store_true", help="Encode and score in single precision")
+    parser.add_argument("--validate", action="store_true", help="Report rows that fail validation")
+    parser.add_argument("--reject-invalid", action="store_true", help="Validate and drop invalid rows")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    col_info = joblib.load(args.col_info)
+    encoder = FeatureEncoder(model, col_info)
+
+    start = time.perf_counter()
+    chunks = read_chunks(args.source, chunksize=args.chunksize)
+    validator = None
+    if args.validate or args.reject_invalid:
+        from validation import REJECT_CHECKS, UploadValidator, validated
+        validator = UploadValidator(col_info, encoder.vocabularies, reject=REJECT_CHECKS if args.reject_invalid else ())
+        chunks = validated(chunks, validator)
+    scored_chunks = score_chunks(chunks, model, encoder, top_k=args.top_k,
+                                 dtype=np.float32 if args.float32 else np.float64)
+    rows = write_results(scored_chunks, args.destination, args.partition_by)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9) * 60:,.0f} rows/min)")
+    if validator is not None:
+        report = validator.report()
+        print(f"\nValidation: {len(report)} issue(s) over {validator.rows:,} rows, {validator.rejected:,} rejected")
+        if len(report):
+            print(report.to_string(index=False, formatters={"SHARE": "{:.2%}".format}))
+
+
+if __name__ == "__main__":
+    main()
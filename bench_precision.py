@@ -0,0 +1,108 @@
+"""Parity check and benchmark of float32 scoring against the float64 sklearn model.
+
+Usage: python bench_precision.py [--rows N] [--tolerance T] [--source subscribers.csv]
+
+Scores the same subscribers three ways: sklearn's ``predict_proba`` on the float64
+feature matrix (the reference), and the batch path with float64 and float32 feature
+matrices, and compares float32 partial-dependence and ICE curves with float64 ones.
+Fails with an AssertionError if any float32 probability differs from its reference
+by more than the tolerance. Reports agreement of risk levels and reason codes, then
+the throughput and peak allocation of the encode + score step for each precision.
+"""
+import argparse
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from batch import top_k_reasons
+from dependence import frame_chunks, partial_dependence
+from encoding import FeatureEncoder
+from parallel import COL_INFO_PATH, synthetic_subscribers
+from scoring import MODEL_PATH, risk_level, score_with_contributions
+
+TOLERANCE = 1e-5
+
+
+def encode_and_score(model, encoder, chunk, dtype):
+    X = encoder.encode_frame(chunk, dtype=dtype)
+    probs, contributions, _ = score_with_contributions(model, X, encoder.feature_means)
+    return probs, top_k_reasons(contributions)
+
+
+def assert_within(name, actual, expected, tolerance):
+    """Raise AssertionError when ``actual`` strays from ``expected`` by more than ``tolerance``."""
+    error = np.max(np.abs(np.asarray(actual, dtype=np.float64) - expected), initial=0.0)
+    # Raised explicitly so the check still runs under python -O
+    if error > tolerance:
+        raise AssertionError(f"{name}: float32 max |error| {error:.2e} exceeds tolerance {tolerance:.0e}")
+    return error
+
+
+def measure(model, encoder, chunk, dtype, repeats=3):
+    """Best wall time and peak traced allocation of encoding and scoring ``chunk``."""
+    encode_and_score(model, encoder, chunk.head(1000), dtype)
+    elapsed = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        encode_and_score(model, encoder, chunk, dtype)
+        elapsed.append(time.perf_counter() - start)
+    tracemalloc.start()
+    encode_and_score(model, encoder, chunk, dtype)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(elapsed), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark float32 scoring.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--source", default=None, help="Subscriber CSV to use instead of synthetic rows")
+    args = parser.parse_args()
+
+    model = joblib.load(MODEL_PATH)
+    col_info = joblib.load(COL_INFO_PATH)
+    encoder = FeatureEncoder(model, col_info)
+    if args.source:
+        chunk = pd.read_csv(args.source, nrows=args.rows)
+    else:
+        chunk = synthetic_subscribers(col_info, args.rows)
+
+    # Reference: sklearn on the float64 feature matrix
+    X64 = encoder.encode_frame(chunk)
+    reference = model.predict_proba(pd.DataFrame(X64, columns=encoder.feature_names))[:, 1]
+    probs64, reasons64 = encode_and_score(model, encoder, chunk, np.float64)
+    probs32, reasons32 = encode_and_score(model, encoder, chunk, np.float32)
+
+    error64 = np.abs(probs64 - reference)
+    error32 = np.abs(probs32.astype(np.float64) - reference)
+    band_agreement = np.mean(np.asarray(risk_level(probs32)) == np.asarray(risk_level(reference)))
+    reason_agreement = np.mean(reasons32 == reasons64)
+    print(f"Parity on {len(chunk):,} rows against sklearn float64:")
+    print(f"  float64 path: max |error| {error64.max():.2e}")
+    print(f"  float32 path: max |error| {error32.max():.2e}, mean {error32.mean():.2e} (tolerance {args.tolerance:.0e})")
+    print(f"  float32 risk levels agree on {band_agreement:.4%} of rows, reason codes on {reason_agreement:.4%}")
+    assert_within("Probabilities", probs32, reference, args.tolerance)
+
+    # Partial dependence over the same subscribers, as the Feature Effects tab computes it
+    curves64 = partial_dependence(model, encoder, col_info, frame_chunks(chunk), "DATA_VOLUME")
+    curves32 = partial_dependence(model, encoder, col_info, frame_chunks(chunk), "DATA_VOLUME", dtype=np.float32)
+    pd_error = assert_within("Partial dependence", curves32["pd"], curves64["pd"], args.tolerance)
+    ice_error = assert_within("ICE curves", curves32["ice"], curves64["ice"], args.tolerance)
+    print(f"  float32 DATA_VOLUME curves: partial dependence max |error| {pd_error:.2e}, ICE {ice_error:.2e}")
+
+    print(f"\n{'precision':>9} {'seconds':>8} {'rows/min':>14} {'peak MB':>9}")
+    results = {}
+    for name, dtype in (("float64", np.float64), ("float32", np.float32)):
+        elapsed, peak = measure(model, encoder, chunk, dtype)
+        results[name] = (elapsed, peak)
+        print(f"{name:>9} {elapsed:>8.3f} {len(chunk) / elapsed * 60:>14,.0f} {peak / 1024 ** 2:>9.1f}")
+    (t64, m64), (t32, m32) = results["float64"], results["float32"]
+    print(f"\nfloat32: {t64 / t32:.2f}x throughput, {1 - m32 / m64:.0%} less peak allocation")
+
+
+if __name__ == "__main__":
+    main()
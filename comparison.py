@@ -0,0 +1,88 @@
+"""Side-by-side scoring of named subscriber profiles."""
+import numpy as np
+import pandas as pd
+
+from encoding import NUM_COLS_TO_SCALE, RAW_COLUMNS
+from scoring import risk_level, score_with_contributions
+
+
+def _as_frame(profiles):
+    """DataFrame of raw columns indexed by profile name from a dict of value dicts."""
+    if isinstance(profiles, dict):
+        profiles = pd.DataFrame.from_dict(profiles, orient="index")
+    frame = profiles.reindex(columns=RAW_COLUMNS)
+    frame[NUM_COLS_TO_SCALE] = frame[NUM_COLS_TO_SCALE].astype(np.float64)
+    return frame
+
+
+class ProfileComparison:
+    """Named profiles with their encoded rows, probabilities and contributions.
+
+    Profiles added together are encoded and scored in one call; ``update`` diffs an
+    edited table against the stored profiles and rescores only the rows that changed.
+    """
+
+    def __init__(self, model, encoder, version=None):
+        self.model = model
+        self.encoder = encoder
+        self.version = version
+        self.profiles = _as_frame(pd.DataFrame(columns=RAW_COLUMNS))
+        self.X = np.empty((0, encoder.n_features))
+        self.probs = np.empty(0)
+        self.contributions = np.empty((0, encoder.n_features))
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def _score(self, rows):
+        if not len(rows):
+            return
+        X = self.encoder.encode_frame(self.profiles.iloc[rows])
+        probs, contributions, _ = score_with_contributions(self.model, X, self.encoder.feature_means)
+        self.X[rows] = X
+        self.probs[rows] = probs
+        self.contributions[rows] = contributions
+
+    def add(self, profiles):
+        """Add or replace profiles (a dict of name -> raw values, or a DataFrame indexed by name)."""
+        frame = _as_frame(profiles)
+        new = frame.index.difference(self.profiles.index, sort=False)
+        n_new = len(new)
+        if n_new:
+            self.profiles = pd.concat([self.profiles, frame.loc[new]]) if len(self.profiles) else frame.loc[new]
+            self.X = np.vstack([self.X, np.empty((n_new, self.encoder.n_features))])
+            self.probs = np.r_[self.probs, np.empty(n_new)]
+            self.contributions = np.vstack([self.contributions, np.empty((n_new, self.encoder.n_features))])
+        self.profiles.loc[frame.index] = frame
+        self._score(self.profiles.index.get_indexer(frame.index))
+        return self
+
+    def remove(self, names):
+        keep = ~self.profiles.index.isin(names)
+        self.profiles = self.profiles[keep]
+        self.X, self.probs, self.contributions = self.X[keep], self.probs[keep], self.contributions[keep]
+        return self
+
+    def update(self, edited):
+        """Apply an edited copy of ``profiles`` and rescore the changed rows; returns their names."""
+        edited = _as_frame(edited).reindex(self.profiles.index)
+        same = (edited == self.profiles) | (edited.isna() & self.profiles.isna())
+        rows = np.flatnonzero(~same.to_numpy().all(axis=1))
+        if len(rows):
+            self.profiles.iloc[rows] = edited.iloc[rows]
+            self._score(rows)
+        return list(self.profiles.index[rows])
+
+    def rescored(self, model, encoder, version=None):
+        """The same profiles scored by another model, in a single call."""
+        return ProfileComparison(model, encoder, version).add(self.profiles)
+
+    def table(self, baseline=None, bands=()):
+        """Probability, risk level and change against the ``baseline`` profile for every profile."""
+        result = pd.DataFrame({
+            "CHURN_PROBABILITY": self.probs,
+            "RISK_LEVEL": risk_level(self.probs, *bands),
+        }, index=self.profiles.index)
+        if baseline in result.index:
+            result["DELTA"] = self.probs - result.at[baseline, "CHURN_PROBABILITY"]
+        return result
@@ -0,0 +1,139 @@
+"""Smallest changes to actionable features that bring a subscriber below a churn threshold.
+
+Usage: python counterfactual.py scored.{csv,parquet} offers.{csv,parquet} [--target P] [--min-probability P]
+
+Because the model is linear in the encoded features, moving a numeric column by one
+standard deviation moves the logit by that column's coefficient. The change with the
+smallest total size (in standard deviations) that closes the gap to the target is
+therefore greedy: use the columns with the largest |coefficient| first, each up to its
+``col_info`` range. The column order is the same for every subscriber, so a whole
+chunk is solved with one cumulative sum.
+"""
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from batch import read_chunks, write_results
+from encoding import NUM_COLS_TO_SCALE, FeatureEncoder
+from scoring import MEDIUM_RISK, predict_proba
+
+ACTIONABLE_COLUMNS = ["REVENUE", "MONTANT", "FREQUENCE_RECH", "FREQUENCE", "DATA_VOLUME", "ON_NET",
+                      "REGULARITY", "FREQ_TOP_PACK"]
+# Counterfactuals aim this far (in logits) below the target so they land strictly under it
+MARGIN = 1e-6
+
+
+def logit(p):
+    return np.log(p / (1.0 - p))
+
+
+class CounterfactualSearch:
+    """Minimal changes to ``columns`` that bring churn probability below a target.
+
+    ``slope`` holds the logit change per raw unit of each column; ``low``/``high`` the
+    range of reference values the changed values must stay within.
+    """
+
+    def __init__(self, model, encoder, col_info, columns=ACTIONABLE_COLUMNS):
+        self.model = model
+        self.encoder = encoder
+        coef = model.coef_[0]
+        scale = np.array([encoder.stds[NUM_COLS_TO_SCALE.index(col)] for col in columns])
+        weight = np.array([coef[encoder.position[col]] for col in columns])
+        # Cheapest columns first: largest logit change per standard deviation
+        order = np.argsort(-np.abs(weight), kind="stable")
+        self.columns = [columns[i] for i in order]
+        self.slope = (weight / scale)[order]
+        self.means = np.array([encoder.means[NUM_COLS_TO_SCALE.index(col)] for col in self.columns])
+        ranges = [np.asarray(col_info[col], dtype=np.float64) for col in self.columns]
+        self.low = np.array([np.nanmin(values) for values in ranges])
+        self.high = np.array([np.nanmax(values) for values in ranges])
+
+    def _room(self, raw):
+        # How far each value can move in the direction that lowers churn
+        room = np.where(self.slope < 0, self.high - raw, raw - self.low)
+        return np.where(self.slope == 0, 0.0, np.maximum(room, 0.0))
+
+    def search(self, chunk, target=MEDIUM_RISK, X=None):
+        """Counterfactual for every row of a raw DataFrame chunk.
+
+        Returns a DataFrame with the change to each actionable column (0 where unused),
+        the resulting probability, whether the target is reachable within the ranges, and
+        the column carrying most of the change. Rows already below the target need no change.
+        """
+        if X is None:
+            X = self.encoder.encode_frame(chunk)
+        logits = X @ self.model.coef_[0] + self.model.intercept_[0]
+        gap = np.maximum(logits - logit(target) + MARGIN, 0.0)
+
+        raw = chunk[self.columns].to_numpy(dtype=np.float64)
+        raw = np.where(np.isnan(raw), self.means, raw)
+        caps = self._room(raw) * np.abs(self.slope)
+        before = np.cumsum(caps, axis=1) - caps
+        used = np.clip(gap[:, None] - before, 0.0, caps)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = np.where(used > 0, -np.sign(self.slope) * used / np.abs(self.slope), 0.0)
+
+        result = pd.DataFrame(change, columns=[f"CHANGE_{col}" for col in self.columns], index=chunk.index)
+        result["COUNTERFACTUAL_PROBABILITY"] = 1.0 / (1.0 + np.exp(-(logits - used.sum(axis=1))))
+        result["FEASIBLE"] = caps.sum(axis=1) >= gap
+        lever = np.argmax(used / np.abs(self.slope), axis=1)
+        result["PRIMARY_LEVER"] = pd.Categorical.from_codes(
+            np.where(gap > 0, lever, -1), categories=self.columns)
+        return result
+
+    def single_lever_options(self, values, target=MEDIUM_RISK):
+        """For one subscriber (a dict of raw values), the change each column alone would need."""
+        x = self.encoder.encode_row(values)
+        prob = float(predict_proba(self.model, x)[0])
+        gap = max(float(logit(prob) - logit(target)) + MARGIN, 0.0)
+        raw = np.array([values[col] for col in self.columns], dtype=np.float64)
+        room = self._room(raw)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            needed = gap / np.abs(self.slope)
+        change = -np.sign(self.slope) * needed
+        return pd.DataFrame({
+            "FEATURE": self.columns,
+            "CURRENT": raw,
+            "REQUIRED_CHANGE": change,
+            "NEW_VALUE": raw + change,
+            "FEASIBLE": (needed <= room) & (self.slope != 0),
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute retention counterfactuals for a subscriber file.")
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    parser.add_argument("--target", type=float, default=MEDIUM_RISK,
+                        help="Churn probability each counterfactual must fall below")
+    parser.add_argument("--min-probability", type=float, default=None,
+                        help="Only keep subscribers at or above this probability (defaults to --target)")
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument("--model", default="clf.joblib")
+    parser.add_argument("--col-info", default="unique_elements_dict2.joblib")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    col_info = joblib.load(args.col_info)
+    encoder = FeatureEncoder(model, col_info)
+    search = CounterfactualSearch(model, encoder, col_info)
+    min_probability = args.target if args.min_probability is None else args.min_probability
+
+    def offers():
+        for chunk in read_chunks(args.source, chunksize=args.chunksize):
+            X = encoder.encode_frame(chunk)
+            at_risk = predict_proba(model, X) >= min_probability
+            chunk = chunk[at_risk]
+            yield pd.concat([chunk, search.search(chunk, args.target, X[at_risk])], axis=1)
+
+    start = time.perf_counter()
+    rows = write_results(offers(), args.destination)
+    print(f"Wrote {rows:,} counterfactuals in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
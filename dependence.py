@@ -0,0 +1,100 @@
+"""Partial-dependence and ICE curves of the churn model over a population of subscribers."""
+import numpy as np
+import pandas as pd
+
+from encoding import DERIVED_COLUMNS, NUM_COLS_TO_SCALE
+
+GRID_POINTS = 25
+N_ICE = 50
+# Upper bound on the (rows x grid points) cells scored at once
+CHUNK_CELLS = 2_000_000
+
+
+def feature_grid(encoder, col_info, col, n_points=GRID_POINTS):
+    """Grid labels, their encoded values and the feature position for one raw column.
+
+    Numeric grids are quantiles (1st to 99th percentile) of the reference values;
+    categorical grids are the column's whole vocabulary.
+    """
+    if col in NUM_COLS_TO_SCALE:
+        values = np.asarray(col_info[col], dtype=np.float64)
+        values = values[~np.isnan(values)]
+        grid = np.unique(np.quantile(values, np.linspace(0.01, 0.99, n_points)))
+        return grid, encoder.scale(col, grid), encoder.position[col]
+    derived = {raw: name for name, raw in DERIVED_COLUMNS.items()}[col]
+    vocab = encoder.vocabularies[col]
+    return vocab.labels, vocab.encoded, encoder.position[derived]
+
+
+def dependence_curves(model, X, position, encoded_grid, chunk_cells=CHUNK_CELLS):
+    """Sum over rows of the churn probability at every grid value, and the per-row curves.
+
+    Each row's logit is split into the part that does not involve the varied feature
+    plus ``coef * grid``, so a chunk of rows is scored against the whole grid as one
+    (rows x grid) matrix without copying the feature matrix per grid value.
+    """
+    coef = model.coef_[0].astype(X.dtype, copy=False)
+    rest = X @ coef + X.dtype.type(model.intercept_[0]) - X[:, position] * coef[position]
+    grid_logit = (coef[position] * np.asarray(encoded_grid, dtype=np.float64)).astype(X.dtype)
+    step = max(chunk_cells // max(len(grid_logit), 1), 1)
+    total = np.zeros(len(grid_logit))
+    for start in range(0, len(rest), step):
+        with np.errstate(over="ignore"):
+            probs = 1.0 / (1.0 + np.exp(-(rest[start:start + step, None] + grid_logit)))
+        total += probs.sum(axis=0, dtype=np.float64)
+    return total, rest
+
+
+def partial_dependence(model, encoder, col_info, frames, col, n_points=GRID_POINTS, n_ice=N_ICE,
+                       chunk_cells=CHUNK_CELLS, random_state=0, dtype=np.float64):
+    """Partial dependence and ICE curves of ``col`` over an iterable of raw DataFrame chunks.
+
+    Returns a dict with ``grid`` (labels), ``pd`` (mean probability per grid value),
+    ``ice`` (an n_ice x grid array of individual curves) and ``rows``. With
+    ``dtype=np.float32`` rows are encoded and scored in single precision.
+    """
+    grid, encoded_grid, position = feature_grid(encoder, col_info, col, n_points)
+    grid_logit = model.coef_[0][position] * np.asarray(encoded_grid, dtype=np.float64)
+    rng = np.random.default_rng(random_state)
+    total = np.zeros(len(grid))
+    rows = 0
+    # Bottom-k keys keep a uniform sample of ICE rows across chunks
+    ice_keys = np.empty(0)
+    ice_rest = np.empty(0)
+    X = None
+    for chunk in frames:
+        if not len(chunk):
+            continue
+        if X is None or X.shape[0] != len(chunk):
+            X = np.empty((len(chunk), encoder.n_features), dtype=dtype)
+        encoder.encode_frame(chunk, out=X)
+        chunk_total, rest = dependence_curves(model, X, position, encoded_grid, chunk_cells)
+        total += chunk_total
+        rows += len(chunk)
+        ice_keys = np.r_[ice_keys, rng.random(len(rest))]
+        ice_rest = np.r_[ice_rest, rest.astype(np.float64)]
+        if len(ice_keys) > n_ice:
+            keep = np.argpartition(ice_keys, n_ice)[:n_ice]
+            ice_keys, ice_rest = ice_keys[keep], ice_rest[keep]
+    ice = 1.0 / (1.0 + np.exp(-(ice_rest[:, None] + grid_logit)))
+    return {"grid": grid, "pd": total / max(rows, 1), "ice": ice, "rows": rows}
+
+
+def frame_chunks(df, chunksize=200_000):
+    """Row slices of an in-memory DataFrame, for feeding ``partial_dependence``."""
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def curves_frame(curves, col):
+    """Long-format DataFrame of the ICE curves plus the partial-dependence curve, for plotting."""
+    grid = curves["grid"]
+    ice = curves["ice"]
+    return pd.concat([
+        pd.DataFrame({
+            col: np.tile(grid, len(ice)),
+            "CHURN_PROBABILITY": ice.ravel(),
+            "CURVE": np.repeat([f"Subscriber {i + 1}" for i in range(len(ice))], len(grid)),
+        }),
+        pd.DataFrame({col: grid, "CHURN_PROBABILITY": curves["pd"], "CURVE": "Partial dependence"}),
+    ], ignore_index=True)
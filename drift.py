@@ -0,0 +1,132 @@
+"""Feature drift monitoring with incrementally maintained fixed-bin histograms."""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from encoding import CATEGORICAL_COLUMNS, NUM_COLS_TO_SCALE
+
+N_BINS = 10
+EPSILON = 1e-4
+# Usual PSI reading: below 0.1 stable, up to 0.25 moderate shift, above that major shift
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+
+
+def reference_histograms(col_info, vocabularies, n_bins=N_BINS):
+    """Training-time reference histogram of every model input column.
+
+    Uses ``col_info["HISTOGRAMS"]`` (``{"edges", "counts"}`` per numeric column) when the
+    training pipeline stored them; otherwise numeric bins are quantiles of the
+    reference values in ``col_info`` and each reference value counts once. Categorical
+    columns use one bin per vocabulary code plus a trailing bin for unknown labels.
+    """
+    stored = col_info.get("HISTOGRAMS", {})
+    frequencies = col_info.get("FREQUENCIES", {})
+    reference = {}
+    for col in NUM_COLS_TO_SCALE:
+        if col in stored:
+            edges = np.asarray(stored[col]["edges"], dtype=np.float64)
+            counts = np.asarray(stored[col]["counts"], dtype=np.float64)
+        else:
+            values = np.asarray(col_info[col], dtype=np.float64)
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+            counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        reference[col] = (edges, counts.astype(np.float64))
+    for col in CATEGORICAL_COLUMNS:
+        vocab = vocabularies[col]
+        counts = np.array([frequencies.get(col, {}).get(label, 1) for label in vocab.labels] + [0],
+                          dtype=np.float64)
+        reference[col] = (None, counts)
+    return reference
+
+
+def psi(reference, current):
+    """Population stability index between two histograms over the same bins."""
+    ref = reference / max(reference.sum(), 1) + EPSILON
+    cur = current / max(current.sum(), 1) + EPSILON
+    return float(np.sum((cur - ref) * np.log(cur / ref)))
+
+
+def ks(reference, current):
+    """Kolmogorov-Smirnov distance between two binned distributions."""
+    ref = np.cumsum(reference) / max(reference.sum(), 1)
+    cur = np.cumsum(current) / max(current.sum(), 1)
+    return float(np.max(np.abs(ref - cur)))
+
+
+class DriftMonitor:
+    """Running histograms of scored subscribers compared against the reference.
+
+    Each update bins a chunk with ``np.searchsorted`` / vocabulary codes and adds its
+    bincounts to the running totals, so merging costs O(bins) and history is never
+    rescanned. Safe to share between sessions.
+    """
+
+    def __init__(self, reference, vocabularies):
+        self.reference = reference
+        self.vocabularies = vocabularies
+        self.counts = {col: np.zeros_like(counts) for col, (_, counts) in reference.items()}
+        self.missing = dict.fromkeys(reference, 0)
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def _bin(self, col, values):
+        edges, counts = self.reference[col]
+        if edges is None:
+            codes = self.vocabularies[col].lookup_codes(values)
+            missing = pd.isna(values)
+            codes = np.where(codes < 0, len(counts) - 1, codes)[~missing]
+        else:
+            values = np.asarray(values, dtype=np.float64)
+            missing = np.isnan(values)
+            codes = np.searchsorted(edges, values[~missing], side="right")
+        return np.bincount(codes, minlength=len(counts)), int(np.count_nonzero(missing))
+
+    def update(self, chunk):
+        """Fold a DataFrame chunk of raw subscriber columns into the histograms."""
+        binned = {col: self._bin(col, chunk[col].to_numpy()) for col in self.reference if col in chunk}
+        with self._lock:
+            for col, (counts, missing) in binned.items():
+                self.counts[col] += counts
+                self.missing[col] += missing
+            self.rows += len(chunk)
+        return self
+
+    def update_row(self, values):
+        """Fold one scored subscriber (a dict of raw values) into the histograms."""
+        return self.update(pd.DataFrame([values]))
+
+    def report(self):
+        """PSI, KS and share of missing values per column, most drifted first."""
+        with self._lock:
+            counts = {col: c.copy() for col, c in self.counts.items()}
+            missing = dict(self.missing)
+            rows = self.rows
+        records = []
+        for col, (edges, reference) in self.reference.items():
+            value = psi(reference, counts[col])
+            records.append({
+                "FEATURE": col,
+                "PSI": value,
+                "KS": ks(reference, counts[col]) if edges is not None else np.nan,
+                "MISSING_SHARE": missing[col] / rows if rows else 0.0,
+                "STATUS": "Major shift" if value > PSI_MAJOR else "Moderate shift" if value > PSI_MODERATE else "Stable",
+            })
+        return pd.DataFrame(records).sort_values("PSI", ascending=False, ignore_index=True)
+
+    def histogram(self, col):
+        """Reference and current bin shares of one column, with readable bin labels."""
+        edges, reference = self.reference[col]
+        with self._lock:
+            current = self.counts[col].copy()
+        if edges is None:
+            labels = list(self.vocabularies[col].labels) + ["Unknown"]
+        else:
+            bounds = np.r_[-np.inf, edges, np.inf]
+            labels = [f"[{lo:,.0f}, {hi:,.0f})" for lo, hi in zip(bounds[:-1], bounds[1:])]
+        return pd.DataFrame({
+            "BIN": labels,
+            "REFERENCE": reference / max(reference.sum(), 1),
+            "CURRENT": current / max(current.sum(), 1),
+        })
@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+
+# Raw columns collected by the prediction form
+RAW_COLUMNS = [
+    "REGION", "TENURE", "MONTANT", "FREQUENCE_RECH", "REVENUE", "ARPU_SEGMENT",
+    "FREQUENCE", "DATA_VOLUME", "ON_NET", "ORANGE", "TIGO", "REGULARITY",
+    "TOP_PACK", "FREQ_TOP_PACK"
+]
+
+CATEGORICAL_COLUMNS = ["REGION", "TENURE", "TOP_PACK"]
+
+# Columns standardised before scoring
+NUM_COLS_TO_SCALE = [
+    "MONTANT", "FREQUENCE_RECH", "REVENUE", "ARPU_SEGMENT",
+    "FREQUENCE", "DATA_VOLUME", "ON_NET", "ORANGE", "TIGO", "REGULARITY", "FREQ_TOP_PACK"
+]
+
+# Derived columns and the raw column each one encodes
+DERIVED_COLUMNS = {"REGION_FE": "REGION", "TENURE_OE": "TENURE", "TOP_PACK_FE": "TOP_PACK"}
+
+FEATURE_COLUMNS = NUM_COLS_TO_SCALE + list(DERIVED_COLUMNS)
+
+TENURE_ORDER = ['A < 1 month', 'B 1-3 month', 'C 3-6 month', 'D 6-9 month',
+                'E 9-12 month', 'F 12-15 month', 'G 15-18 month', 'H 18-21 month',
+                'I 21-24 month', 'J 24 month', 'K > 24 month']
+
+
+def tenure_code(label):
+    """Ordinal code of a tenure band, taken from its letter prefix (A=0 ... K=10)."""
+    if label in TENURE_ORDER:
+        return TENURE_ORDER.index(label)
+    code = ord(str(label)[:1].upper()) - ord("A")
+    return code if 0 <= code < len(TENURE_ORDER) else -1
+
+
+def nearest_tenure(labels, label):
+    """The label in ``labels`` whose tenure band is closest to ``label``'s (None if it has no band)."""
+    code = tenure_code(label)
+    if code < 0:
+        return None
+    return min(labels, key=lambda candidate: abs(tenure_code(candidate) - code))
+
+
+def _category_weights(col_info, col):
+    counts = col_info.get("FREQUENCIES", {}).get(col, {})
+    return np.array([counts.get(v, 1) for v in col_info[col]], dtype=np.float64)
+
+
+def _weighted_moments(values, weights):
+    mean = np.average(values, weights=weights)
+    std = np.sqrt(np.average((values - mean) ** 2, weights=weights))
+    return mean, std
+
+
+def reference_stats(col_info):
+    """Mean and standard deviation of each scaled column.
+
+    Uses the training statistics stored under ``col_info["STATS"]`` when present and
+    otherwise falls back to the spread of the reference values kept in ``col_info``.
+    """
+    stats = col_info.get("STATS", {})
+    means = np.empty(len(NUM_COLS_TO_SCALE))
+    stds = np.empty(len(NUM_COLS_TO_SCALE))
+    for i, col in enumerate(NUM_COLS_TO_SCALE):
+        if col in stats:
+            means[i] = stats[col]["mean"]
+            stds[i] = stats[col]["std"]
+        else:
+            values = np.asarray(col_info[col], dtype=np.float64)
+            means[i] = values.mean()
+            stds[i] = values.std()
+    stds[stds == 0] = 1.0
+    return means, stds
+
+
+def frequency_encoding(col_info, col):
+    """Min-max normalised frequency of every category of ``col``.
+
+    Categories without a frequency table in ``col_info["FREQUENCIES"]`` are treated as
+    equally frequent, which normalises to 0 exactly like a single-row fit did.
+    """
+    freq = _category_weights(col_info, col)
+    span = freq.max() - freq.min() if len(freq) else 0.0
+    scaled = (freq - freq.min()) / span if span > 0 else np.zeros_like(freq)
+    return dict(zip(col_info[col], scaled.tolist()))
+
+
+def check_schema(model, col_info):
+    """Validate that the model and the reference data agree with FEATURE_COLUMNS."""
+    names = list(getattr(model, "feature_names_in_", []))
+    if sorted(names) != sorted(FEATURE_COLUMNS):
+        missing = sorted(set(FEATURE_COLUMNS) - set(names))
+        extra = sorted(set(names) - set(FEATURE_COLUMNS))
+        raise ValueError(f"Model features do not match the encoder (missing={missing}, unexpected={extra})")
+    if list(getattr(model, "classes_", [])) != [0, 1]:
+        raise ValueError("Model must be a binary classifier with classes [0, 1]")
+    if np.shape(model.coef_) != (1, len(names)):
+        raise ValueError(f"Model coefficients have shape {np.shape(model.coef_)}, expected (1, {len(names)})")
+    missing_info = [col for col in RAW_COLUMNS if col not in col_info]
+    if missing_info:
+        raise ValueError(f"Column info is missing {missing_info}")
+    return names
+
+
+class Vocabulary:
+    """Dictionary encoding of one categorical column.
+
+    ``codes`` maps a label to its integer code, ``labels`` maps a code back to the label
+    and ``encoded`` holds the model feature value of every code. Unknown labels get
+    code -1 and the value returned by ``fallback`` (0.0 when there is none).
+    """
+
+    def __init__(self, column, labels, encoded, fallback=None):
+        self.column = column
+        self.labels = np.array(labels, dtype=object)
+        self.codes = {label: i for i, label in enumerate(labels)}
+        self.encoded = np.asarray(encoded, dtype=np.float64)
+        self.fallback = fallback
+
+    def __len__(self):
+        return len(self.labels)
+
+    def code(self, label):
+        return self.codes.get(label, -1)
+
+    def encode(self, label):
+        code = self.codes.get(label)
+        if code is not None:
+            return self.encoded[code]
+        return float(self.fallback(label)) if self.fallback else 0.0
+
+    def _lookup(self, values, fn, dtype):
+        # Resolve each distinct value once, then gather per row
+        values = pd.Series(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            row_codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            row_codes, uniques = pd.factorize(values)
+        table = np.fromiter((fn(u) for u in uniques), dtype=dtype, count=len(uniques))
+        # Missing values have row code -1, which picks the trailing "unknown" entry
+        table = np.append(table, fn(None))
+        return table[row_codes]
+
+    def lookup_codes(self, values):
+        """Integer codes for an array of labels (-1 for unknown or missing)."""
+        return self._lookup(values, self.code, np.int64)
+
+    def encode_many(self, values):
+        """Model feature values for an array of labels."""
+        return self._lookup(values, self.encode, np.float64)
+
+
+def build_vocabularies(col_info):
+    """Vocabulary for each categorical column, in the order of ``col_info``."""
+    region_fe = frequency_encoding(col_info, "REGION")
+    top_pack_fe = frequency_encoding(col_info, "TOP_PACK")
+    return {
+        "REGION": Vocabulary("REGION", col_info["REGION"], [region_fe[v] for v in col_info["REGION"]]),
+        "TENURE": Vocabulary("TENURE", col_info["TENURE"], [tenure_code(v) for v in col_info["TENURE"]],
+                             fallback=lambda label: tenure_code(label) if label is not None else -1),
+        "TOP_PACK": Vocabulary("TOP_PACK", col_info["TOP_PACK"], [top_pack_fe[v] for v in col_info["TOP_PACK"]]),
+    }
+
+
+class FeatureEncoder:
+    """Turns raw subscriber values into the model's feature vector.
+
+    Everything that depends only on the model and ``col_info`` (feature order, scaling
+    statistics, category vocabularies) is resolved once here, so encoding a subscriber
+    is a handful of dict lookups and one vector operation.
+    """
+
+    def __init__(self, model, col_info):
+        self.feature_names = check_schema(model, col_info)
+        self.n_features = len(self.feature_names)
+        position = {name: i for i, name in enumerate(self.feature_names)}
+        self.position = position
+
+        self.means, self.stds = reference_stats(col_info)
+        self.num_positions = np.array([position[col] for col in NUM_COLS_TO_SCALE])
+
+        self.vocabularies = build_vocabularies(col_info)
+        # (feature position, vocabulary) of each derived categorical feature
+        self.categorical = [(position[name], self.vocabularies[col]) for name, col in DERIVED_COLUMNS.items()]
+
+        # Training-population mean and spread of every encoded feature, in feature order.
+        # Standardised columns are 0/1 by construction; the derived ones are weighted
+        # by category frequency.
+        self.feature_means = np.zeros(self.n_features)
+        self.feature_stds = np.ones(self.n_features)
+        for pos, vocab in self.categorical:
+            mean, std = _weighted_moments(vocab.encoded, _category_weights(col_info, vocab.column))
+            self.feature_means[pos] = mean
+            self.feature_stds[pos] = std
+
+    def scale(self, col, values):
+        """Standardise raw values of one numeric column."""
+        i = NUM_COLS_TO_SCALE.index(col)
+        return (np.asarray(values, dtype=np.float64) - self.means[i]) / self.stds[i]
+
+    def encode_row(self, values, out=None):
+        """Encode one subscriber (a dict of raw values) into a (1, n_features) float64 row.
+
+        ``out`` may be a preallocated row that is overwritten in place.
+        """
+        if out is None:
+            out = np.empty((1, self.n_features), dtype=np.float64)
+        row = out[0]
+        raw = np.fromiter((values[col] for col in NUM_COLS_TO_SCALE), dtype=np.float64,
+                          count=len(NUM_COLS_TO_SCALE))
+        row[self.num_positions] = (raw - self.means) / self.stds
+        for pos, vocab in self.categorical:
+            row[pos] = vocab.encode(values[vocab.column])
+        return out
+
+    def encode_frame(self, df, out=None, dtype=np.float64):
+        """Encode a DataFrame of raw columns into an (n_rows, n_features) matrix.
+
+        Missing numeric values are imputed with the training mean. ``out`` may be a
+        preallocated float32 or float64 matrix; otherwise one of ``dtype`` is allocated.
+        """
+        if out is None:
+            out = np.empty((len(df), self.n_features), dtype=dtype)
+        # Scaled in the output precision so float32 never materialises a float64 copy
+        dtype = out.dtype
+        scaled = (df[NUM_COLS_TO_SCALE].to_numpy(dtype=dtype) - self.means.astype(dtype)) / self.stds.astype(dtype)
+        # Missing numerics are imputed with the training mean, as in train.py
+        scaled[np.isnan(scaled)] = 0.0
+        out[:, self.num_positions] = scaled
+        for pos, vocab in self.categorical:
+            out[:, pos] = vocab.encode_many(df[vocab.column])
+        return out
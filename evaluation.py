@@ -0,0 +1,102 @@
+"""Holdout evaluation of the churn model from a single sort of the scores."""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from batch import score_csv
+
+LABEL_COLUMN = "CHURN"
+MAX_CURVE_POINTS = 2000
+
+
+def file_hash(data):
+    """Short content hash of an uploaded file's bytes."""
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def cumulative_counts(y_true, scores):
+    """Sort once and return thresholds, true and false positives per distinct score, and
+    the labels in score order.
+
+    Row i describes the classifier that flags every subscriber with score >= thresholds[i].
+    """
+    order = np.argsort(-scores, kind="mergesort")
+    sorted_scores = scores[order]
+    sorted_labels = y_true[order]
+    distinct = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(sorted_scores) - 1]
+    tps = np.cumsum(sorted_labels)[distinct]
+    fps = distinct + 1 - tps
+    return sorted_scores[distinct], tps, fps, sorted_labels
+
+
+def _thin(*arrays, max_points=MAX_CURVE_POINTS):
+    n = len(arrays[0])
+    if n <= max_points:
+        return arrays
+    keep = np.unique(np.linspace(0, n - 1, max_points).astype(int))
+    return tuple(a[keep] for a in arrays)
+
+
+def evaluate(y_true, scores, threshold=0.5, n_bins=10):
+    """ROC, precision-recall, confusion matrix and lift for binary labels and scores."""
+    y_true = np.asarray(y_true, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.float64)
+    thresholds, tps, fps, sorted_labels = cumulative_counts(y_true, scores)
+    n_pos = int(tps[-1])
+    n_neg = int(fps[-1])
+
+    tpr = np.r_[0.0, tps / max(n_pos, 1)]
+    fpr = np.r_[0.0, fps / max(n_neg, 1)]
+    precision = np.r_[1.0, tps / (tps + fps)]
+    recall = tpr
+    auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+    average_precision = float(np.sum(np.diff(recall) * precision[1:]))
+
+    # Confusion matrix at the decision threshold: last distinct score still >= threshold
+    k = np.searchsorted(-thresholds, -threshold, side="right")
+    tp = int(tps[k - 1]) if k else 0
+    fp = int(fps[k - 1]) if k else 0
+    fn = n_pos - tp
+    tn = n_neg - fp
+
+    # Cumulative lift by population bin, from the same ordering
+    n = len(sorted_labels)
+    cuts = np.ceil(np.arange(1, n_bins + 1) * n / n_bins).astype(int)
+    captured = np.cumsum(sorted_labels)[cuts - 1]
+    base_rate = n_pos / max(n, 1)
+    lift = (captured / cuts) / base_rate if base_rate else np.zeros(n_bins)
+
+    fpr_plot, tpr_plot = _thin(fpr, tpr)
+    recall_plot, precision_plot = _thin(recall, precision)
+    return {
+        "n": n,
+        "positives": n_pos,
+        "auc": auc,
+        "average_precision": average_precision,
+        "accuracy": (tp + tn) / max(n, 1),
+        "precision": tp / max(tp + fp, 1),
+        "recall": tp / max(n_pos, 1),
+        "f1": 2 * tp / max(2 * tp + fp + fn, 1),
+        "confusion_matrix": np.array([[tn, fp], [fn, tp]]),
+        "roc": pd.DataFrame({"fpr": fpr_plot, "tpr": tpr_plot}),
+        "pr": pd.DataFrame({"recall": recall_plot, "precision": precision_plot}),
+        "lift": pd.DataFrame({
+            "population_share": cuts / n,
+            "captured_share": captured / max(n_pos, 1),
+            "lift": lift,
+        }),
+    }
+
+
+def score_holdout(source, model, encoder):
+    """Score a labeled holdout CSV in chunks, keeping only label, probability and revenue."""
+    keep = [LABEL_COLUMN, "CHURN_PROBABILITY", "REVENUE"]
+    return pd.concat([scored[keep] for scored in score_csv(source, model, encoder, top_k=0)],
+                     ignore_index=True)
+
+
+def evaluate_holdout(source, model, encoder, threshold=0.5):
+    """Score a labeled holdout CSV in chunks and evaluate it."""
+    scored = score_holdout(source, model, encoder)
+    return evaluate(scored[LABEL_COLUMN].to_numpy(), scored["CHURN_PROBABILITY"].to_numpy(), threshold=threshold)
@@ -0,0 +1,188 @@
+"""Multi-process batch scoring over shared memory.
+
+Usage:
+    python parallel.py subscribers.{csv,parquet,arrow} scored.{csv,parquet} [--workers N] [--chunksize N]
+                       [--partition-by REGION|RISK_LEVEL] [--float32]
+    python parallel.py --benchmark [--rows N] [--float32]
+
+The parent process encodes each chunk straight into a shared-memory feature matrix.
+A process pool, which loads the model once per worker, scores row ranges of it
+(probabilities, contributions and top-k reason codes) and writes the results into
+shared output arrays. Only row bounds and segment names cross process boundaries.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from batch import TOP_K_REASONS, read_chunks, reason_names, top_k_reasons, write_results
+from encoding import RAW_COLUMNS, FeatureEncoder
+from scoring import MODEL_PATH, risk_level, score_with_contributions
+from thresholds import load_bands
+
+COL_INFO_PATH = "unique_elements_dict2.joblib"
+DEFAULT_CHUNKSIZE = 1_000_000
+
+# Per-worker state, filled once by _init_worker
+_worker = {}
+
+
+def _init_worker(model_path, col_info_path):
+    model = joblib.load(model_path)
+    encoder = FeatureEncoder(model, joblib.load(col_info_path))
+    _worker.update(model=model, center=encoder.feature_means, segments={})
+
+
+def _attach(name, shape, dtype):
+    segments = _worker["segments"]
+    if name not in segments:
+        # Pool workers share the parent's resource tracker, so the parent's unlink
+        # is the only cleanup needed
+        segments[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=dtype, buffer=segments[name].buf)
+
+
+def _score_range(task):
+    layout, start, stop = task
+    X = _attach(*layout["X"])[start:stop]
+    probs, contributions, _ = score_with_contributions(_worker["model"], X, _worker["center"])
+    _attach(*layout["probs"])[start:stop] = probs
+    if layout["reasons"] is not None:
+        name, shape, dtype = layout["reasons"]
+        _attach(name, shape, dtype)[start:stop] = top_k_reasons(contributions, shape[1])
+    return stop - start
+
+
+class SharedMemoryScorer:
+    """Scores chunks of up to ``capacity`` rows with a pool of ``workers`` processes."""
+
+    def __init__(self, model_path=MODEL_PATH, col_info_path=COL_INFO_PATH, workers=None,
+                 capacity=DEFAULT_CHUNKSIZE, top_k=TOP_K_REASONS, bands=None, dtype=np.float64):
+        self.model = joblib.load(model_path)
+        self.encoder = FeatureEncoder(self.model, joblib.load(col_info_path))
+        self.workers = workers or os.cpu_count()
+        self.capacity = capacity
+        self.top_k = min(top_k, self.encoder.n_features)
+        self.bands = bands or load_bands()
+        self.categories = reason_names(self.encoder)
+
+        self._segments = []
+        self.layout = {"reasons": None}
+        # float32 halves the shared feature matrix and the bytes each worker streams
+        self.X = self._allocate("X", (capacity, self.encoder.n_features), dtype)
+        self.probs = self._allocate("probs", (capacity,), dtype)
+        self.reasons = self._allocate("reasons", (capacity, self.top_k), np.int64) if self.top_k else None
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                        initargs=(model_path, col_info_path))
+
+    def _allocate(self, key, shape, dtype):
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        segment = shared_memory.SharedMemory(create=True, size=size)
+        self._segments.append(segment)
+        # What a worker needs to map the same segment: name, shape and dtype
+        self.layout[key] = (segment.name, shape, np.dtype(dtype).str)
+        return np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+    def score_encoded(self, n_rows):
+        """Score the first ``n_rows`` rows already written into the shared feature matrix."""
+        layout = self.layout
+        bounds = np.linspace(0, n_rows, min(self.workers, max(n_rows, 1)) + 1).astype(int)
+        tasks = [(layout, start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+        return sum(self.pool.map(_score_range, tasks))
+
+    def score_chunk(self, chunk):
+        """Score a DataFrame chunk of raw rows, returning it with the batch.score_chunk columns."""
+        n_rows = len(chunk)
+        if n_rows > self.capacity:
+            return pd.concat([self.score_chunk(chunk.iloc[i:i + self.capacity])
+                              for i in range(0, n_rows, self.capacity)])
+        self.encoder.encode_frame(chunk, out=self.X[:n_rows])
+        self.score_encoded(n_rows)
+        probs = self.probs[:n_rows].copy()
+        scored = pd.DataFrame({
+            "CHURN_PROBABILITY": probs,
+            "RISK_LEVEL": risk_level(probs, *self.bands),
+        }, index=chunk.index)
+        if self.reasons is not None:
+            reasons = self.reasons[:n_rows]
+            for i in range(self.top_k):
+                scored[f"REASON_{i + 1}"] = pd.Categorical.from_codes(reasons[:, i], categories=self.categories)
+        return pd.concat([chunk, scored], axis=1)
+
+    def close(self):
+        self.pool.shutdown()
+        self.X = self.probs = self.reasons = None
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def synthetic_subscribers(col_info, n_rows, seed=0):
+    """Random subscribers drawn from the reference values, for benchmarking."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        col: rng.choice(np.asarray(col_info[col], dtype=object if col in ("REGION", "TENURE", "TOP_PACK") else np.float64), n_rows)
+        for col in RAW_COLUMNS
+    })
+
+
+def benchmark(n_rows, max_workers=None, dtype=np.float64):
+    """Print scoring throughput and speedup for 1..max_workers processes on synthetic rows."""
+    max_workers = max_workers or os.cpu_count()
+    chunk = synthetic_subscribers(joblib.load(COL_INFO_PATH), n_rows)
+    counts = sorted({1, 2, 4, 8, 16, 32, 64, max_workers} & set(range(1, max_workers + 1)))
+    baseline = None
+    print(f"{'workers':>7} {'score s':>8} {'rows/min':>14} {'speedup':>8}")
+    for workers in counts:
+        with SharedMemoryScorer(workers=workers, capacity=n_rows, dtype=dtype) as scorer:
+            scorer.encoder.encode_frame(chunk, out=scorer.X[:n_rows])
+            scorer.score_encoded(n_rows)  # warm the pool: workers load the model here
+            start = time.perf_counter()
+            scorer.score_encoded(n_rows)
+            elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>8.3f} {n_rows / elapsed * 60:>14,.0f} {baseline / elapsed:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a subscriber file with a shared-memory process pool.")
+    parser.add_argument("source", nargs="?")
+    parser.add_argument("destination", nargs="?")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--top-k", type=int, default=TOP_K_REASONS)
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--partition-by", choices=["REGION", "RISK_LEVEL"], default=None)
+    parser.add_argument("--float32", action="store_true", help="Encode and score in single precision")
+    args = parser.parse_args()
+    dtype = np.float32 if args.float32 else np.float64
+
+    if args.benchmark:
+        benchmark(args.rows, args.workers, dtype)
+        return
+    if not (args.source and args.destination):
+        parser.error("source and destination are required unless --benchmark is given")
+
+    start = time.perf_counter()
+    with SharedMemoryScorer(workers=args.workers, capacity=args.chunksize, top_k=args.top_k, dtype=dtype) as scorer:
+        scored_chunks = (scorer.score_chunk(chunk) for chunk in read_chunks(args.source, chunksize=args.chunksize))
+        rows = write_results(scored_chunks, args.destination, args.partition_by)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9) * 60:,.0f} rows/min)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Incremental refresh of the churn model from newly labeled subscriber chunks.
+
+Usage: python refresh.py labels-2024-05.csv [more.csv ...] --holdout holdout.csv
+
+The current model's coefficients are the starting point; new chunks are streamed
+from disk with mini-batch gradient steps, so memory stays bounded by the chunk size.
+The refreshed model replaces clf.joblib only if it beats the current one on the
+holdout; the previous model is archived under models/.
+"""
+import argparse
+import copy
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from encoding import FeatureEncoder
+from evaluation import LABEL_COLUMN, evaluate
+from scoring import MODEL_PATH, model_version, predict_proba
+
+DEFAULT_CHUNKSIZE = 100_000
+BATCH_SIZE = 1024
+ARCHIVE_DIR = "models"
+
+
+class IncrementalLogit:
+    """Logistic regression updated by mini-batch gradient descent on streamed chunks."""
+
+    def __init__(self, coef, intercept, learning_rate=0.05, alpha=1e-4, batch_size=BATCH_SIZE, random_state=42):
+        self.coef = np.array(coef, dtype=np.float64).ravel()
+        self.intercept = float(np.ravel(intercept)[0])
+        self.learning_rate = learning_rate
+        self.alpha = alpha
+        self.batch_size = batch_size
+        self.steps = 0
+        self.rng = np.random.default_rng(random_state)
+
+    @classmethod
+    def from_model(cls, model, **kwargs):
+        return cls(model.coef_, model.intercept_, **kwargs)
+
+    def partial_fit(self, X, y):
+        """One shuffled pass of mini-batch steps over an encoded chunk."""
+        y = np.asarray(y, dtype=np.float64)
+        order = self.rng.permutation(len(y))
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            Xb, yb = X[rows], y[rows]
+            error = 1.0 / (1.0 + np.exp(-(Xb @ self.coef + self.intercept))) - yb
+            rate = self.learning_rate / np.sqrt(1.0 + self.steps)
+            self.coef -= rate * (Xb.T @ error / len(rows) + self.alpha * self.coef)
+            self.intercept -= rate * error.mean()
+            self.steps += 1
+        return self
+
+    def to_model(self, template):
+        """Copy of a fitted sklearn LogisticRegression carrying these coefficients."""
+        model = copy.deepcopy(template)
+        model.coef_ = self.coef.reshape(1, -1).copy()
+        model.intercept_ = np.array([self.intercept])
+        return model
+
+
+def labeled_chunks(paths, encoder, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield (encoded features, labels) for each chunk of each labeled CSV file."""
+    X = None
+    for path in paths:
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            chunk = chunk.dropna(subset=[LABEL_COLUMN])
+            if X is None or X.shape[0] != len(chunk):
+                X = np.empty((len(chunk), encoder.n_features), dtype=np.float64)
+            yield encoder.encode_frame(chunk, out=X), chunk[LABEL_COLUMN].to_numpy()
+
+
+def holdout_metrics(models, holdout_path, encoder, chunksize=DEFAULT_CHUNKSIZE):
+    """AUC and log loss of several models on the same holdout, scored chunk by chunk."""
+    labels = []
+    scores = [[] for _ in models]
+    for X, y in labeled_chunks([holdout_path], encoder, chunksize):
+        labels.append(y)
+        for model_scores, model in zip(scores, models):
+            model_scores.append(predict_proba(model, X))
+    y = np.concatenate(labels)
+    results = []
+    for model_scores in scores:
+        p = np.clip(np.concatenate(model_scores), 1e-15, 1 - 1e-15)
+        results.append({
+            "auc": evaluate(y, p)["auc"],
+            "log_loss": float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))),
+        })
+    return results
+
+
+def publish(model, path=MODEL_PATH, archive_dir=ARCHIVE_DIR):
+    """Archive the current model file and atomically replace it with ``model``."""
+    os.makedirs(archive_dir, exist_ok=True)
+    if os.path.exists(path):
+        previous = os.path.join(archive_dir, f"clf-{model_version(path)}.joblib")
+        if not os.path.exists(previous):
+            with open(path, "rb") as src, open(previous, "wb") as dst:
+                dst.write(src.read())
+    tmp_path = f"{path}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+    return model_version(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the churn model from newly labeled chunks.")
+    parser.add_argument("labels", nargs="+", help="Labeled CSV files with a CHURN column")
+    parser.add_argument("--holdout", required=True)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--learning-rate", type=float, default=0.05)
+    parser.add_argument("--alpha", type=float, default=1e-4)
+    parser.add_argument("--metric", choices=["log_loss", "auc"], default="log_loss")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--col-info", default="unique_elements_dict2.joblib")
+    parser.add_argument("--dry-run", action="store_true", help="Evaluate without publishing")
+    args = parser.parse_args()
+
+    current = joblib.load(args.model)
+    encoder = FeatureEncoder(current, joblib.load(args.col_info))
+
+    learner = IncrementalLogit.from_model(current, learning_rate=args.learning_rate, alpha=args.alpha)
+    rows = 0
+    for _ in range(args.epochs):
+        for X, y in labeled_chunks(args.labels, encoder, args.chunksize):
+            learner.partial_fit(X, y)
+            rows += len(y)
+    candidate = learner.to_model(current)
+
+    current_metrics, candidate_metrics = holdout_metrics([current, candidate], args.holdout, encoder, args.chunksize)
+    print(f"Trained on {rows:,} labeled rows")
+    print(f"Current:   AUC {current_metrics['auc']:.4f}  log loss {current_metrics['log_loss']:.4f}")
+    print(f"Candidate: AUC {candidate_metrics['auc']:.4f}  log loss {candidate_metrics['log_loss']:.4f}")
+
+    if args.metric == "auc":
+        better = candidate_metrics["auc"] > current_metrics["auc"]
+    else:
+        better = candidate_metrics["log_loss"] < current_metrics["log_loss"]
+    if not better:
+        print(f"Candidate does not improve {args.metric}; keeping the current model.")
+    elif args.dry_run:
+        print("Candidate is better; not published (dry run).")
+    else:
+        print(f"Published model version {publish(candidate, args.model)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Model resources loaded once per process and shared by every dashboard session.
+
+These are plain functions rather than Streamlit caches so that they can be loaded
+before any session exists (see warmup.py and serve.py); the app reads them through
+the same functions.
+"""
+import functools
+import threading
+
+import joblib
+import numpy as np
+
+from counterfactual import CounterfactualSearch
+from encoding import NUM_COLS_TO_SCALE, FeatureEncoder
+from scoring import MODEL_PATH
+from shared_store import SHARED_DIR, shared_artifacts
+
+COL_INFO_PATH = "unique_elements_dict2.joblib"
+
+
+def process_cached(fn):
+    """Memoise ``fn`` per argument tuple for the life of the process.
+
+    Concurrent callers with the same arguments wait for the first one instead of
+    loading again, so a session arriving mid warm-up reuses the warm-up's work.
+    """
+    results = {}
+    lock = threading.Lock()
+
+    @functools.wraps(fn)
+    def wrapper(*args):
+        with lock:
+            if args not in results:
+                results[args] = fn(*args)
+            return results[args]
+    return wrapper
+
+
+# Model-derived resources take the model version as an argument so that a new
+# clf.joblib gets fresh copies instead of stale cached ones
+@process_cached
+def load_artifacts(version):
+    # Under serve.py (CHURN_SHARED_DIR set) the coefficients and numeric reference
+    # values are memory-mapped files shared by every worker process
+    if SHARED_DIR:
+        return shared_artifacts(version, MODEL_PATH, COL_INFO_PATH)
+    col_info = joblib.load(COL_INFO_PATH)
+    for col in NUM_COLS_TO_SCALE:
+        col_info[col] = np.asarray(col_info[col], dtype=np.float64)
+    return joblib.load(MODEL_PATH), col_info
+
+
+def load_model(version):
+    return load_artifacts(version)[0]
+
+
+def load_col_info(version):
+    return load_artifacts(version)[1]
+
+
+@process_cached
+def load_encoder(version):
+    # Schema is checked and the categorical vocabularies are built once per model version
+    return FeatureEncoder(load_model(version), load_col_info(version))
+
+
+@process_cached
+def load_counterfactual_search(version):
+    return CounterfactualSearch(load_model(version), load_encoder(version), load_col_info(version))
+
+
+@process_cached
+def load_static_figures():
+    """Sample charts of the Data Insights tab; they never change."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    segments = ['New Users', 'Low Usage', 'Medium Usage', 'High Usage', 'Premium']
+    segment_chart = go.Figure(data=[
+        go.Bar(name='High Risk', x=segments, y=[42, 28, 18, 15, 12], marker_color='#F44336'),
+        go.Bar(name='Medium Risk', x=segments, y=[35, 40, 45, 30, 25], marker_color='#FFC107'),
+        go.Bar(name='Low Risk', x=segments, y=[23, 32, 37, 55, 63], marker_color='#4CAF50')
+    ])
+    segment_chart.update_layout(
+        barmode='stack',
+        title='Customer Segments by Churn Risk',
+        xaxis_title='Customer Segment',
+        yaxis_title='Percentage',
+        legend_title='Risk Level',
+        height=400
+    )
+
+    reasons_chart = px.pie(
+        values=[35, 25, 15, 12, 8, 5],
+        names=['Price', 'Competitor Offers', 'Service Quality', 'Network Coverage', 'Customer Service', 'Other'],
+        title='Primary Reasons for Churn',
+        color_discrete_sequence=px.colors.sequential.Oranges
+    )
+    reasons_chart.update_traces(textposition='inside', textinfo='percent+label')
+    reasons_chart.update_layout(height=400)
+    return {"segments": segment_chart, "reasons": reasons_chart}
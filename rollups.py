@@ -0,0 +1,109 @@
+"""Segment rollups of scored subscribers over dictionary-encoded categorical columns."""
+import numpy as np
+import pandas as pd
+
+from scoring import RISK_LEVELS
+
+SEGMENT_COLUMNS = ["REGION", "TENURE", "TOP_PACK"]
+UNKNOWN = "Unknown"
+# (latitude, longitude) of each region's capital, for the map
+REGION_COORDINATES = {
+    "DAKAR": (14.69, -17.45),
+    "DIOURBEL": (14.65, -16.23),
+    "FATICK": (14.34, -16.41),
+    "KAFFRINE": (14.11, -15.55),
+    "KAOLACK": (14.15, -16.07),
+    "KEDOUGOU": (12.56, -12.17),
+    "KOLDA": (12.89, -14.94),
+    "LOUGA": (15.62, -16.22),
+    "MATAM": (15.66, -13.25),
+    "SAINT-LOUIS": (16.02, -16.49),
+    "SEDHIOU": (12.71, -15.56),
+    "TAMBACOUNDA": (13.77, -13.67),
+    "THIES": (14.79, -16.93),
+    "ZIGUINCHOR": (12.56, -16.27),
+}
+
+
+class SegmentRollup:
+    """Counts, probability sums and risk-band counts for every REGION x TENURE x TOP_PACK cell.
+
+    Each scored chunk is reduced with a single ``np.bincount`` over a mixed-radix
+    segment code, so updates cost O(rows + cells) and any breakdown by a subset of the
+    columns is a sum over axes of the cell arrays.
+    """
+
+    def __init__(self, vocabularies):
+        self.vocabularies = vocabularies
+        # One extra trailing code per column collects values outside the vocabulary
+        self.categories = {col: list(vocabularies[col].labels) + [UNKNOWN] for col in SEGMENT_COLUMNS}
+        self.shape = tuple(len(self.categories[col]) for col in SEGMENT_COLUMNS)
+        n_cells = int(np.prod(self.shape))
+        self.count = np.zeros(n_cells)
+        self.prob_sum = np.zeros(n_cells)
+        self.band_count = np.zeros((len(RISK_LEVELS), n_cells))
+
+    def _codes(self, values, col):
+        vocab = self.vocabularies[col]
+        codes = vocab.lookup_codes(values)
+        return np.where(codes < 0, len(vocab), codes)
+
+    def update(self, scored):
+        """Fold a scored chunk (raw columns plus CHURN_PROBABILITY and RISK_LEVEL) in."""
+        key = np.zeros(len(scored), dtype=np.int64)
+        for col, size in zip(SEGMENT_COLUMNS, self.shape):
+            key = key * size + self._codes(scored[col], col)
+        n_cells = self.count.size
+        self.count += np.bincount(key, minlength=n_cells)
+        self.prob_sum += np.bincount(key, weights=scored["CHURN_PROBABILITY"].to_numpy(), minlength=n_cells)
+        bands = pd.Categorical(scored["RISK_LEVEL"], categories=RISK_LEVELS).codes.astype(np.int64)
+        self.band_count += np.bincount(bands * n_cells + key, minlength=len(RISK_LEVELS) * n_cells).reshape(
+            len(RISK_LEVELS), n_cells)
+        return self
+
+    def table(self, by):
+        """Rollup by a subset of SEGMENT_COLUMNS, one row per non-empty segment."""
+        by = [col for col in SEGMENT_COLUMNS if col in by]
+        drop_axes = tuple(i for i, col in enumerate(SEGMENT_COLUMNS) if col not in by)
+        count = self.count.reshape(self.shape).sum(axis=drop_axes).ravel()
+        prob_sum = self.prob_sum.reshape(self.shape).sum(axis=drop_axes).ravel()
+        bands = self.band_count.reshape((len(RISK_LEVELS),) + self.shape).sum(
+            axis=tuple(axis + 1 for axis in drop_axes)).reshape(len(RISK_LEVELS), -1)
+
+        present = np.flatnonzero(count)
+        index = None
+        if by:
+            index = pd.MultiIndex.from_product([self.categories[col] for col in by], names=by)[present]
+        result = pd.DataFrame({
+            "SUBSCRIBERS": count[present].astype(np.int64),
+            "MEAN_CHURN_PROBABILITY": prob_sum[present] / count[present],
+        }, index=index)
+        for level, band in zip(RISK_LEVELS, bands):
+            result[f"{level.upper()}_RISK"] = band[present].astype(np.int64)
+        result["AT_RISK_SHARE"] = result["HIGH_RISK"] / result["SUBSCRIBERS"]
+        return result.reset_index() if by else result
+
+    def region_points(self, max_radius=40_000):
+        """One map point per located region: position, size, colour and tooltip text.
+
+        Everything the map draws is computed here, so the browser receives one small row
+        per region however many subscribers were scored.
+        """
+        table = self.table(["REGION"])
+        located = table["REGION"].isin(list(REGION_COORDINATES))
+        table = table[located].reset_index(drop=True)
+        coordinates = np.array([REGION_COORDINATES[region] for region in table["REGION"]]).reshape(-1, 2)
+        table["LAT"] = coordinates[:, 0]
+        table["LON"] = coordinates[:, 1]
+        # Area proportional to subscribers; colour from pale to deep orange with mean probability
+        table["RADIUS"] = max_radius * np.sqrt(table["SUBSCRIBERS"] / max(table["SUBSCRIBERS"].max(), 1))
+        probability = table["MEAN_CHURN_PROBABILITY"].to_numpy()
+        spread = probability.max() - probability.min() if len(probability) else 0.0
+        shade = (probability - probability.min()) / spread if spread > 0 else np.full(len(probability), 0.5)
+        table["COLOR"] = [[255, int(g), int(b), 200] for g, b in zip(224 - 164 * shade, 178 - 178 * shade)]
+        table["TOOLTIP"] = [
+            f"{region}: {subscribers:,} subscribers, mean churn {mean:.1%}, high risk {share:.1%}"
+            for region, subscribers, mean, share in zip(table["REGION"], table["SUBSCRIBERS"],
+                                                        table["MEAN_CHURN_PROBABILITY"], table["AT_RISK_SHARE"])
+        ]
+        return table[["REGION", "LAT", "LON", "RADIUS", "COLOR", "TOOLTIP", "SUBSCRIBERS", "MEAN_CHURN_PROBABILITY"]]
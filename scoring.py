@@ -0,0 +1,65 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+MODEL_PATH = "clf.joblib"
+
+# Lower bounds of the High and Medium risk bands
+HIGH_RISK = 0.7
+MEDIUM_RISK = 0.3
+RISK_LEVELS = ["Low", "Medium", "High"]
+
+
+def model_version(path=MODEL_PATH):
+    """Short content hash of a model file, used to key caches derived from the model."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _coef(model, X):
+    # float32 feature matrices are scored in float32; everything else in float64
+    dtype = np.float32 if getattr(X, "dtype", None) == np.float32 else np.float64
+    return model.coef_[0].astype(dtype, copy=False), dtype
+
+
+def predict_proba(model, X):
+    """Churn probability for each row of an encoded feature matrix.
+
+    Equivalent to ``model.predict_proba(X)[:, 1]`` for the logistic model, without
+    sklearn's per-call input validation. A float32 ``X`` is scored in float32.
+    """
+    coef, dtype = _coef(model, X)
+    logits = X @ coef + dtype(model.intercept_[0])
+    with np.errstate(over="ignore"):
+        return 1.0 / (1.0 + np.exp(-logits))
+
+
+def score_with_contributions(model, X, center):
+    """Churn probabilities plus each feature's contribution to the logit, in one pass.
+
+    Contributions are ``coef * (x - center)``, where ``center`` is the encoded average
+    subscriber, so for every row ``base_logit + contributions.sum()`` is exactly the
+    model's logit. A float32 ``X`` is scored in float32.
+    """
+    coef, dtype = _coef(model, X)
+    contributions = (X - center.astype(dtype, copy=False)) * coef
+    base_logit = center @ model.coef_[0] + model.intercept_[0]
+    logits = contributions.sum(axis=1) + dtype(base_logit)
+    with np.errstate(over="ignore"):
+        return 1.0 / (1.0 + np.exp(-logits)), contributions, base_logit
+
+
+def global_importances(model, encoder):
+    """Standardised coefficients ``|coef| * training std`` keyed by feature name."""
+    importance = np.abs(model.coef_[0]) * encoder.feature_stds
+    return dict(zip(encoder.feature_names, importance.tolist()))
+
+
+def risk_level(probs, high=HIGH_RISK, medium=MEDIUM_RISK):
+    """Categorical Low/Medium/High risk band for an array of probabilities."""
+    codes = (np.asarray(probs) >= medium).astype(np.int8) + (np.asarray(probs) >= high)
+    return pd.Categorical.from_codes(codes, categories=RISK_LEVELS, ordered=True)
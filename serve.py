@@ -0,0 +1,90 @@
+"""Run several dashboard worker processes on consecutive ports behind a reverse proxy.
+
+Usage: python serve.py [--workers N] [--base-port 8501] [--shared-dir shared] [--app app-1.py]
+
+The current model version is exported once to memory-mappable files under the shared
+directory before the workers start; every worker maps the same files and shares one
+SQLite result cache. See README.md for the proxy configuration (sticky sessions are
+required). Before any worker starts, a probe subscriber is scored against the exported
+artifacts so a broken model fails here rather than in the first analyst's session.
+
+Each worker is this script run with --worker: it starts the warm-up (see warmup.py)
+and then the Streamlit server in the same process, so the model, encoders and static
+figures are loading while the server starts and are ready for the first session.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from encoding import FeatureEncoder
+from resources import COL_INFO_PATH
+from scoring import MODEL_PATH, model_version
+from shared_store import RESULT_CACHE_FILE, ResultCache, shared_artifacts
+from warmup import probe_prediction, start_warmup
+
+
+def run_worker(app, port, address):
+    """Serve ``app`` from this process, with its caches warming up from the start."""
+    start_warmup(model_version(MODEL_PATH))
+    from streamlit.web import cli
+    sys.argv = [
+        "streamlit", "run", app,
+        "--server.port", str(port),
+        "--server.address", address,
+        "--server.headless", "true",
+    ]
+    sys.exit(cli.main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start several dashboard workers sharing model memory and results.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--base-port", type=int, default=8501)
+    parser.add_argument("--address", default="127.0.0.1", help="Workers listen here; only the proxy should reach them")
+    parser.add_argument("--shared-dir", default="shared")
+    parser.add_argument("--app", default="app-1.py")
+    parser.add_argument("--worker", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        run_worker(args.app, args.worker, args.address)
+
+    shared_dir = os.path.abspath(args.shared_dir)
+    version = model_version(MODEL_PATH)
+    model, col_info = shared_artifacts(version, MODEL_PATH, COL_INFO_PATH, shared_dir)
+    ResultCache(os.path.join(shared_dir, RESULT_CACHE_FILE))
+    print(f"Model version {version} exported to {shared_dir}")
+    probe = probe_prediction(model, FeatureEncoder(model, col_info), col_info)
+    print(f"Probe subscriber scored {probe:.2%}")
+
+    env = dict(os.environ, CHURN_SHARED_DIR=shared_dir)
+    workers = []
+    for i in range(args.workers):
+        port = args.base_port + i
+        workers.append(subprocess.Popen([
+            sys.executable, os.path.abspath(__file__), "--worker", str(port),
+            "--app", args.app, "--address", args.address,
+        ], env=env))
+        print(f"Worker {i + 1} on http://{args.address}:{port}")
+
+    def stop(*_):
+        for worker in workers:
+            worker.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        while all(worker.poll() is None for worker in workers):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+        for worker in workers:
+            worker.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Approximate memory accounting and caps for dashboard sessions.
+
+Sizes are estimates: DataFrames and arrays report their buffers, containers are
+walked recursively and everything else falls back to ``sys.getsizeof``. Budgets can
+be set with the CHURN_SESSION_BUDGET_MB and CHURN_HISTORY_LIMIT environment variables.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from arrow_io import ParquetResultWriter
+
+SESSION_BUDGET_MB = float(os.environ.get("CHURN_SESSION_BUDGET_MB", 256))
+HISTORY_LIMIT = int(os.environ.get("CHURN_HISTORY_LIMIT", 1000))
+SPILL_DIR = os.path.join(tempfile.gettempdir(), "churn-sessions")
+# Sessions not seen for this long are dropped from the server view with their spill files
+SESSION_TTL = 6 * 3600
+# Session keys that may be spilled to disk, largest data first
+SPILLABLE_KEYS = ["batch_results"]
+# Session keys holding SessionCache results, which can always be recomputed
+CACHE_KEYS = ["batch_cache"]
+CACHE_ENTRIES = 16
+
+
+def approx_size(obj, seen=None):
+    """Approximate deep size of ``obj`` in bytes."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k, seen) + approx_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += approx_size(vars(obj), seen)
+    return size
+
+
+def state_sizes(state, shared=()):
+    """Approximate size of every entry of a session state mapping, in bytes.
+
+    Objects in ``shared`` (the cached model and encoder) belong to the server, so
+    references to them are not charged to the session.
+    """
+    seen = {id(obj) for obj in shared}
+    return {key: approx_size(value, seen) for key, value in state.items()}
+
+
+class SpilledFrame:
+    """A session DataFrame moved to a Parquet file; ``load`` reads it back."""
+
+    def __init__(self, path, rows):
+        self.path = path
+        self.rows = rows
+
+    def load(self):
+        return pd.read_parquet(self.path)
+
+
+def load_frame(value):
+    """The DataFrame behind a session value that may have been spilled."""
+    return value.load() if isinstance(value, SpilledFrame) else value
+
+
+class SessionCache:
+    """Results derived from one session's data, computed on first use.
+
+    Entries live in session state, so they count against the session's budget;
+    at most ``max_entries`` are kept, least recently used first out.
+    """
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def peek(self, key):
+        """The cached result for ``key``, or None without computing it."""
+        return self.entries.get(key)
+
+    def get(self, key, compute):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        value = compute()
+        self.entries[key] = value
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self.entries.clear()
+
+
+def spill(frame, session_id, key):
+    directory = os.path.join(SPILL_DIR, session_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{key}.parquet")
+    with ParquetResultWriter(path) as writer:
+        writer.write(frame)
+    return SpilledFrame(path, len(frame))
+
+
+def enforce_budget(state, session_id, shared=(), budget_mb=SESSION_BUDGET_MB, history_limit=HISTORY_LIMIT):
+    """Bring a session under its budget; returns the sizes afterwards and what was done.
+
+    The prediction history is always capped at ``history_limit`` entries. Over budget,
+    large DataFrames are spilled to Parquet under SPILL_DIR first, since that loses
+    nothing; then cached results are cleared, since they can be recomputed; only if
+    the session is still over budget is the oldest half of the history evicted.
+    """
+    actions = []
+    history = state.get("prediction_history")
+    if history is not None and len(history) > history_limit:
+        del history[:len(history) - history_limit]
+        actions.append(f"Kept the latest {history_limit:,} predictions")
+
+    budget = budget_mb * 1024 ** 2
+    sizes = state_sizes(state, shared)
+    for key in SPILLABLE_KEYS:
+        if sum(sizes.values()) <= budget:
+            break
+        value = state.get(key)
+        if isinstance(value, pd.DataFrame):
+            state[key] = spill(value, session_id, key)
+            actions.append(f"Moved {key} ({sizes[key] / 1024 ** 2:,.1f} MB) to disk")
+            sizes = state_sizes(state, shared)
+    for key in CACHE_KEYS:
+        if sum(sizes.values()) <= budget:
+            break
+        cache = state.get(key)
+        if isinstance(cache, SessionCache) and cache.entries:
+            cache.clear()
+            actions.append(f"Cleared cached {key} ({sizes[key] / 1024 ** 2:,.1f} MB)")
+            sizes = state_sizes(state, shared)
+    if sum(sizes.values()) > budget and history:
+        evicted = max(len(history) // 2, 1)
+        del history[:evicted]
+        actions.append(f"Evicted the {evicted:,} oldest predictions")
+        sizes = state_sizes(state, shared)
+    return sizes, actions
+
+
+class SessionRegistry:
+    """Server-wide record of every session's latest size. Safe to share between sessions."""
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def record(self, session_id, sizes):
+        now = time.time()
+        with self._lock:
+            self.sessions[session_id] = {"sizes": dict(sizes), "last_seen": now}
+            stale = [sid for sid, entry in self.sessions.items() if now - entry["last_seen"] > self.ttl]
+            for sid in stale:
+                del self.sessions[sid]
+        for sid in stale:
+            shutil.rmtree(os.path.join(SPILL_DIR, sid), ignore_errors=True)
+
+    def table(self, n=20):
+        """The ``n`` largest sessions with their total size and biggest entry."""
+        with self._lock:
+            entries = list(self.sessions.items())
+        records = []
+        for session_id, entry in entries:
+            sizes = entry["sizes"]
+            largest = max(sizes, key=sizes.get) if sizes else None
+            records.append({
+                "SESSION": session_id[:8],
+                "SIZE_MB": sum(sizes.values()) / 1024 ** 2,
+                "LARGEST_ENTRY": largest,
+                "LARGEST_ENTRY_MB": sizes[largest] / 1024 ** 2 if largest else 0.0,
+                "LAST_SEEN": pd.Timestamp(entry["last_seen"], unit="s"),
+            })
+        columns = ["SESSION", "SIZE_MB", "LARGEST_ENTRY", "LARGEST_ENTRY_MB", "LAST_SEEN"]
+        return pd.DataFrame(records, columns=columns).nlargest(n, "SIZE_MB").reset_index(drop=True)
+
+    def total_mb(self):
+        with self._lock:
+            return sum(sum(entry["sizes"].values()) for entry in self.sessions.values()) / 1024 ** 2
@@ -0,0 +1,149 @@
+"""Model artifacts and results shared between several dashboard worker processes.
+
+When CHURN_SHARED_DIR is set (serve.py sets it), each model version is exported
+once to ``<dir>/<version>-<col info hash>/`` as .npy files that every worker memory-maps, so the
+coefficients and the numeric reference values live once in the page cache instead
+of once per process. Results worth reusing across workers go to a SQLite file in
+the same directory.
+"""
+import hashlib
+import os
+import pickle
+import shutil
+import sqlite3
+import threading
+
+import joblib
+import numpy as np
+
+from encoding import NUM_COLS_TO_SCALE
+from scoring import model_version
+
+SHARED_DIR = os.environ.get("CHURN_SHARED_DIR") or None
+RESULT_CACHE_FILE = "results.sqlite"
+MAX_CACHED_RESULTS = 100_000
+
+
+class MappedModel:
+    """Logistic model whose coefficients are memory-mapped arrays.
+
+    Carries the attributes the scoring and encoding code reads from the sklearn model.
+    """
+
+    def __init__(self, coef, intercept, feature_names, classes):
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = len(feature_names)
+        self.classes_ = np.asarray(classes)
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-(np.asarray(X) @ self.coef_[0] + self.intercept_[0])))
+        return np.column_stack([1.0 - p, p])
+
+
+def export_artifacts(model, col_info, directory):
+    """Write a model and its column info as memory-mappable files; a no-op if present.
+
+    Workers may race to export the same version, so files go to a private temporary
+    directory that is renamed into place.
+    """
+    if os.path.isdir(directory):
+        return directory
+    tmp = f"{directory}.tmp-{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    np.save(os.path.join(tmp, "coef.npy"), np.asarray(model.coef_, dtype=np.float64))
+    np.save(os.path.join(tmp, "intercept.npy"), np.asarray(model.intercept_, dtype=np.float64))
+    for col in NUM_COLS_TO_SCALE:
+        np.save(os.path.join(tmp, f"{col}.npy"), np.asarray(col_info[col], dtype=np.float64))
+    # Everything else is small: feature names, vocabularies and training statistics
+    joblib.dump({
+        "feature_names": list(model.feature_names_in_),
+        "classes": list(model.classes_),
+        "col_info": {key: value for key, value in col_info.items() if key not in NUM_COLS_TO_SCALE},
+    }, os.path.join(tmp, "meta.joblib"))
+    try:
+        os.rename(tmp, directory)
+    except OSError:
+        # Another worker finished first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return directory
+
+
+def load_artifacts(directory):
+    """(model, col_info) backed by the memory-mapped files of ``export_artifacts``."""
+    meta = joblib.load(os.path.join(directory, "meta.joblib"))
+    model = MappedModel(np.load(os.path.join(directory, "coef.npy"), mmap_mode="r"),
+                        np.load(os.path.join(directory, "intercept.npy"), mmap_mode="r"),
+                        meta["feature_names"], meta["classes"])
+    col_info = dict(meta["col_info"])
+    for col in NUM_COLS_TO_SCALE:
+        col_info[col] = np.load(os.path.join(directory, f"{col}.npy"), mmap_mode="r")
+    return model, col_info
+
+
+def shared_artifacts(version, model_path, col_info_path, shared_dir=SHARED_DIR):
+    """Memory-mapped (model, col_info) of one model version, exporting it first if needed.
+
+    The directory is keyed by the column info file's hash as well, so regenerating it
+    without retraining still gets a fresh export.
+    """
+    directory = os.path.join(shared_dir, f"{version}-{model_version(col_info_path)}")
+    if not os.path.isdir(directory):
+        os.makedirs(shared_dir, exist_ok=True)
+        export_artifacts(joblib.load(model_path), joblib.load(col_info_path), directory)
+    return load_artifacts(directory)
+
+
+def cache_key(*parts):
+    """Stable key for a tuple of plain values."""
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Pickled results in a SQLite file that every worker process reads and writes.
+
+    WAL mode lets readers proceed while one worker writes. Each thread gets its own
+    connection. Only the newest ``max_entries`` results are kept.
+    """
+
+    def __init__(self, path, max_entries=MAX_CACHED_RESULTS):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connection() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB)")
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, key):
+        row = self._connection().execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        return None if row is None else pickle.loads(row[0])
+
+    def put(self, key, value):
+        with self._connection() as db:
+            db.execute("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                       (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+            # Replaced rows get a new rowid, so the lowest rowids are the oldest results
+            db.execute("DELETE FROM results WHERE rowid <= (SELECT MAX(rowid) FROM results) - ?",
+                       (self.max_entries,))
+        return value
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        return self.put(key, compute()) if value is None else value
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def cached(cache, key, compute):
+    """``compute()`` through ``cache`` when there is one, directly otherwise."""
+    return compute() if cache is None else cache.get_or_compute(key, compute)
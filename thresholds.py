@@ -0,0 +1,67 @@
+"""Cost-aware choice of the High/Medium risk bands and their persistence."""
+import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from scoring import HIGH_RISK, MEDIUM_RISK
+
+BANDS_PATH = "risk_bands.json"
+
+
+def load_bands(path=BANDS_PATH):
+    """Current (high, medium) lower bounds; the defaults until bands have been chosen."""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+        return float(saved["high"]), float(saved["medium"])
+    except (OSError, ValueError, KeyError):
+        return HIGH_RISK, MEDIUM_RISK
+
+
+def save_bands(high, medium, path=BANDS_PATH, **details):
+    """Persist chosen bands atomically so every scoring path picks them up."""
+    if not 0 <= medium <= high <= 1:
+        raise ValueError(f"Bands must satisfy 0 <= medium <= high <= 1, got medium={medium}, high={high}")
+    record = {"high": float(high), "medium": float(medium),
+              "updated": datetime.datetime.now().isoformat(timespec="seconds"), **details}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def sweep_cutoffs(y_true, scores, value_at_risk, actions):
+    """Net value of acting on everyone above each candidate cut-off, for several actions.
+
+    ``actions`` maps an action name to ``(cost per contact, share of churners saved)``.
+    All cut-offs are evaluated from one sort and cumulative sums: contacting the top k
+    subscribers costs ``k * cost`` and saves ``save_rate * value_at_risk`` of the churners
+    among them. The first row is the "contact nobody" cut-off.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float64)
+    value_at_risk = np.broadcast_to(np.asarray(value_at_risk, dtype=np.float64), scores.shape)
+
+    order = np.argsort(-scores, kind="mergesort")
+    sorted_scores = scores[order]
+    distinct = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(sorted_scores) - 1]
+    contacted = distinct + 1
+    churn_value = np.cumsum(y_true[order] * value_at_risk[order])[distinct]
+
+    sweep = pd.DataFrame({
+        "threshold": np.r_[1.0, sorted_scores[distinct]],
+        "contacted": np.r_[0, contacted],
+    })
+    for name, (cost, save_rate) in actions.items():
+        sweep[name] = np.r_[0.0, save_rate * churn_value - cost * contacted]
+    return sweep
+
+
+def optimal_bands(sweep, high_action, medium_action):
+    """Cut-offs maximising the net value of the High and Medium actions (medium <= high)."""
+    high = float(sweep["threshold"].iloc[int(sweep[high_action].to_numpy().argmax())])
+    medium = float(sweep["threshold"].iloc[int(sweep[medium_action].to_numpy().argmax())])
+    return high, min(medium, high)
@@ -0,0 +1,187 @@
+"""Out-of-core training pipeline that produces the artifacts the dashboard loads.
+
+Usage: python train.py Train.csv [--output-dir .] [--chunksize N] [--epochs N]
+
+Pass 1 streams the raw Expresso file once: every tenth row goes to holdout.csv and
+the rest feed the vocabularies, category frequencies, column statistics and a
+bounded uniform sample used for histogram bin edges. Pass 2 streams the training
+rows again to fit the logistic model chunk by chunk and to count the reference
+histograms. Outputs are clf.joblib, unique_elements_dict2.joblib and holdout.csv,
+identical for identical input and arguments.
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from drift import N_BINS
+from encoding import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, NUM_COLS_TO_SCALE, RAW_COLUMNS, FeatureEncoder
+from evaluation import LABEL_COLUMN
+from refresh import DEFAULT_CHUNKSIZE, IncrementalLogit
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+HOLDOUT_EVERY = 10
+SAMPLE_SIZE = 100_000
+RANDOM_STATE = 42
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process so far, in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def make_model(coef, intercept):
+    """Fitted LogisticRegression with the given coefficients over FEATURE_COLUMNS."""
+    model = LogisticRegression(max_iter=1000, random_state=RANDOM_STATE)
+    model.classes_ = np.array([0, 1])
+    model.coef_ = np.asarray(coef, dtype=np.float64).reshape(1, -1)
+    model.intercept_ = np.array([float(intercept)])
+    model.n_features_in_ = len(FEATURE_COLUMNS)
+    model.feature_names_in_ = np.array(FEATURE_COLUMNS, dtype=object)
+    model.n_iter_ = np.array([0], dtype=np.int32)
+    return model
+
+
+class ColumnProfile:
+    """Streaming vocabularies, frequencies, moments and a bounded sample of the training rows."""
+
+    def __init__(self, sample_size=SAMPLE_SIZE, random_state=RANDOM_STATE):
+        # dicts keep first-appearance order, matching pd.unique on the full file
+        self.unique = {col: {} for col in RAW_COLUMNS + [LABEL_COLUMN]}
+        self.frequencies = {col: {} for col in CATEGORICAL_COLUMNS}
+        self.count = np.zeros(len(NUM_COLS_TO_SCALE))
+        self.mean = np.zeros(len(NUM_COLS_TO_SCALE))
+        self.m2 = np.zeros(len(NUM_COLS_TO_SCALE))
+        self.sample_size = sample_size
+        self.sample = np.empty((0, len(NUM_COLS_TO_SCALE)))
+        self.sample_keys = np.empty(0)
+        self.rng = np.random.default_rng(random_state)
+
+    def update(self, chunk):
+        for col in self.unique:
+            self.unique[col].update(dict.fromkeys(chunk[col].dropna().unique().tolist()))
+        for col in CATEGORICAL_COLUMNS:
+            counts = self.frequencies[col]
+            for value, n in chunk[col].value_counts().items():
+                counts[value] = counts.get(value, 0) + int(n)
+
+        # Chan et al. merge of per-chunk mean and sum of squared deviations
+        values = chunk[NUM_COLS_TO_SCALE].to_numpy(dtype=np.float64)
+        n = np.sum(~np.isnan(values), axis=0)
+        has = n > 0
+        chunk_mean = np.where(has, np.nansum(values, axis=0) / np.maximum(n, 1), 0.0)
+        chunk_m2 = np.nansum((values - chunk_mean) ** 2, axis=0)
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean = np.where(total > 0, self.mean + delta * n / np.maximum(total, 1), 0.0)
+        self.m2 += chunk_m2 + delta ** 2 * self.count * n / np.maximum(total, 1)
+        self.count = total
+
+        # Bottom-k sampling on random keys keeps a uniform sample of bounded size
+        keys = self.rng.random(len(values))
+        self.sample = np.vstack([self.sample, values])
+        self.sample_keys = np.r_[self.sample_keys, keys]
+        if len(self.sample_keys) > self.sample_size:
+            keep = np.argpartition(self.sample_keys, self.sample_size)[:self.sample_size]
+            keep.sort()
+            self.sample = self.sample[keep]
+            self.sample_keys = self.sample_keys[keep]
+
+    def col_info(self, n_bins=N_BINS):
+        """Reference dictionary in the unique_elements_dict2.joblib format plus statistics."""
+        col_info = {col: list(values) for col, values in self.unique.items()}
+        std = np.sqrt(self.m2 / np.maximum(self.count, 1))
+        col_info["STATS"] = {
+            col: {"mean": float(self.mean[i]), "std": float(std[i]), "count": int(self.count[i])}
+            for i, col in enumerate(NUM_COLS_TO_SCALE)
+        }
+        col_info["FREQUENCIES"] = {col: dict(counts) for col, counts in self.frequencies.items()}
+        col_info["HISTOGRAMS"] = {}
+        for i, col in enumerate(NUM_COLS_TO_SCALE):
+            values = self.sample[:, i][~np.isnan(self.sample[:, i])]
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])) if len(values) else np.empty(0)
+            col_info["HISTOGRAMS"][col] = {"edges": edges.tolist(), "counts": [0] * (len(edges) + 1)}
+        return col_info
+
+
+def training_chunks(path, chunksize):
+    """Yield (is_holdout mask, chunk) for the raw file, keeping only the model's columns."""
+    offset = 0
+    for chunk in pd.read_csv(path, usecols=RAW_COLUMNS + [LABEL_COLUMN], chunksize=chunksize):
+        chunk = chunk.dropna(subset=[LABEL_COLUMN])
+        holdout = (offset + np.arange(len(chunk))) % HOLDOUT_EVERY == 0
+        offset += len(chunk)
+        yield holdout, chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the churn model and build the dashboard artifacts.")
+    parser.add_argument("source", help="Raw Expresso training CSV")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--alpha", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    holdout_path = os.path.join(args.output_dir, "holdout.csv")
+    start = time.perf_counter()
+
+    # Pass 1: holdout split and streaming column profile
+    profile = ColumnProfile()
+    rows = holdout_rows = 0
+    for i, (holdout, chunk) in enumerate(training_chunks(args.source, args.chunksize)):
+        chunk[holdout].to_csv(holdout_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        profile.update(chunk[~holdout])
+        rows += int((~holdout).sum())
+        holdout_rows += int(holdout.sum())
+    col_info = profile.col_info()
+    print(f"Pass 1: profiled {rows:,} training rows, wrote {holdout_rows:,} holdout rows "
+          f"({time.perf_counter() - start:.1f}s, peak memory {peak_memory_mb() or 0:,.0f} MB)")
+
+    # Pass 2: out-of-core fit and reference histogram counts
+    encoder = FeatureEncoder(make_model(np.zeros(len(FEATURE_COLUMNS)), 0.0), col_info)
+    learner = IncrementalLogit(np.zeros(len(FEATURE_COLUMNS)), 0.0, learning_rate=args.learning_rate,
+                               alpha=args.alpha, random_state=RANDOM_STATE)
+    histograms = col_info["HISTOGRAMS"]
+    X = None
+    for epoch in range(args.epochs):
+        for holdout, chunk in training_chunks(args.source, args.chunksize):
+            chunk = chunk[~holdout]
+            if X is None or X.shape[0] != len(chunk):
+                X = np.empty((len(chunk), encoder.n_features), dtype=np.float64)
+            # Missing numerics are imputed with the training mean by the encoder
+            encoder.encode_frame(chunk, out=X)
+            learner.partial_fit(X, chunk[LABEL_COLUMN].to_numpy())
+            if epoch == 0:
+                for col in NUM_COLS_TO_SCALE:
+                    values = chunk[col].dropna().to_numpy(dtype=np.float64)
+                    edges = histograms[col]["edges"]
+                    counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+                    histograms[col]["counts"] = (np.asarray(histograms[col]["counts"]) + counts).tolist()
+        print(f"Pass 2: epoch {epoch + 1}/{args.epochs} done "
+              f"({time.perf_counter() - start:.1f}s, peak memory {peak_memory_mb() or 0:,.0f} MB)")
+
+    model = make_model(learner.coef, learner.intercept)
+    joblib.dump(model, os.path.join(args.output_dir, "clf.joblib"))
+    joblib.dump(col_info, os.path.join(args.output_dir, "unique_elements_dict2.joblib"))
+    print(f"Wrote clf.joblib, unique_elements_dict2.joblib and holdout.csv to {args.output_dir} "
+          f"in {time.perf_counter() - start:.1f}s; peak memory {peak_memory_mb() or 0:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
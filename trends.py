@@ -0,0 +1,84 @@
+"""Hourly and daily rollups of scored predictions, updated as scores arrive."""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from scoring import HIGH_RISK
+
+HOUR = 3600
+DAY = 24 * HOUR
+# Buckets kept per resolution
+HOURLY_RETENTION = 24 * 30
+DAILY_RETENTION = 365
+
+
+class TimeRollup:
+    """Subscriber count, probability sum and high-risk count per fixed-width time bucket.
+
+    An update reduces its rows to per-bucket sums (one ``np.bincount`` per measure when
+    rows carry their own times), so reading the series costs O(buckets) and never
+    rescans predictions.
+    """
+
+    def __init__(self, width, retention):
+        self.width = width
+        self.retention = retention
+        self.buckets = {}
+
+    def update(self, seconds, probs, high):
+        """Fold rows scored at ``seconds`` (epoch seconds, scalar or per row) in."""
+        probs = np.asarray(probs, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        if np.ndim(seconds) == 0:
+            # A whole chunk scored at once lands in a single bucket
+            keys = np.array([int(seconds) // self.width])
+            counts, sums, highs = np.array([len(probs)]), np.array([probs.sum()]), np.array([high.sum()])
+        else:
+            keys, inverse = np.unique(np.asarray(seconds, dtype=np.int64) // self.width, return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(keys))
+            sums = np.bincount(inverse, weights=probs, minlength=len(keys))
+            highs = np.bincount(inverse, weights=high, minlength=len(keys))
+        for key, values in zip(keys.tolist(), np.column_stack([counts, sums, highs])):
+            if key in self.buckets:
+                self.buckets[key] += values
+            else:
+                self.buckets[key] = values
+        # Drop buckets that fell out of the retention window
+        oldest = max(self.buckets) - self.retention + 1
+        for key in [key for key in self.buckets if key < oldest]:
+            del self.buckets[key]
+
+    def frame(self):
+        """One row per non-empty bucket: TIME, SUBSCRIBERS, MEAN_CHURN_PROBABILITY, HIGH_RISK_SHARE."""
+        keys = np.array(sorted(self.buckets), dtype=np.int64)
+        values = np.array([self.buckets[key] for key in keys.tolist()]).reshape(-1, 3)
+        return pd.DataFrame({
+            "TIME": pd.to_datetime(keys * self.width, unit="s"),
+            "SUBSCRIBERS": values[:, 0].astype(np.int64),
+            "MEAN_CHURN_PROBABILITY": values[:, 1] / np.maximum(values[:, 0], 1),
+            "HIGH_RISK_SHARE": values[:, 2] / np.maximum(values[:, 0], 1),
+        })
+
+
+class TrendMonitor:
+    """Hourly and daily rollups of every prediction. Safe to share between sessions."""
+
+    def __init__(self, hourly_retention=HOURLY_RETENTION, daily_retention=DAILY_RETENTION):
+        self.rollups = {"Hourly": TimeRollup(HOUR, hourly_retention), "Daily": TimeRollup(DAY, daily_retention)}
+        self._lock = threading.Lock()
+
+    def update(self, probs, high_risk=HIGH_RISK, seconds=None):
+        """Record predictions scored at ``seconds`` (now by default); ``high_risk`` is the High band's lower bound."""
+        seconds = time.time() if seconds is None else seconds
+        probs = np.asarray(probs, dtype=np.float64)
+        high = probs >= high_risk
+        with self._lock:
+            for rollup in self.rollups.values():
+                rollup.update(seconds, probs, high)
+        return self
+
+    def frame(self, resolution):
+        with self._lock:
+            return self.rollups[resolution].frame()
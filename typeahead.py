@@ -0,0 +1,60 @@
+"""Server-side type-ahead over high-cardinality categorical values such as TOP_PACK."""
+import bisect
+from collections import defaultdict
+
+GRAM = 3
+
+
+def _grams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class TypeaheadIndex:
+    """Prefix and substring index over a fixed list of names, ranked by frequency.
+
+    Prefix queries are a binary search over the sorted lower-cased names; substring
+    queries intersect trigram posting lists and only verify the surviving candidates.
+    """
+
+    def __init__(self, names, frequencies=None):
+        frequencies = frequencies or {}
+        self.names = list(names)
+        self._keys = [name.lower() for name in self.names]
+        # Rank: most frequent first, original order breaks ties
+        by_rank = sorted(range(len(self.names)), key=lambda i: (-frequencies.get(self.names[i], 0), i))
+        self.rank = [0] * len(self.names)
+        for r, i in enumerate(by_rank):
+            self.rank[i] = r
+        self.ranked = [self.names[i] for i in by_rank]
+
+        self._sorted = sorted((key, i) for i, key in enumerate(self._keys))
+        self._grams = defaultdict(set)
+        for i, key in enumerate(self._keys):
+            for gram in _grams(key):
+                self._grams[gram].add(i)
+
+    def _prefix_matches(self, query):
+        start = bisect.bisect_left(self._sorted, (query, -1))
+        matches = []
+        for key, i in self._sorted[start:]:
+            if not key.startswith(query):
+                break
+            matches.append(i)
+        return matches
+
+    def _substring_matches(self, query):
+        if len(query) < GRAM:
+            return [i for i, key in enumerate(self._keys) if query in key]
+        postings = sorted((self._grams.get(gram, set()) for gram in _grams(query)), key=len)
+        candidates = set.intersection(*postings) if postings else set()
+        return [i for i in candidates if query in self._keys[i]]
+
+    def search(self, query, limit=20):
+        """Top ``limit`` names for a query: prefix matches first, then other substring matches."""
+        query = query.strip().lower()
+        if not query:
+            return self.ranked[:limit]
+        prefix = sorted(self._prefix_matches(query), key=self.rank.__getitem__)
+        seen = set(prefix)
+        substring = sorted((i for i in self._substring_matches(query) if i not in seen), key=self.rank.__getitem__)
+        return [self.names[i] for i in (prefix + substring)[:limit]]
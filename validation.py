@@ -0,0 +1,110 @@
+"""Column-wise validation of subscriber files against the training reference data."""
+import numpy as np
+import pandas as pd
+
+from encoding import CATEGORICAL_COLUMNS, NUM_COLS_TO_SCALE, RAW_COLUMNS
+
+MISSING = "missing"
+UNKNOWN_CATEGORY = "unknown category"
+BELOW_RANGE = "below training range"
+ABOVE_RANGE = "above training range"
+CHECKS = [MISSING, UNKNOWN_CATEGORY, BELOW_RANGE, ABOVE_RANGE]
+# Checks whose rows are dropped when rejecting; missing numerics are imputed instead
+REJECT_CHECKS = [UNKNOWN_CATEGORY, BELOW_RANGE, ABOVE_RANGE]
+SAMPLE_ROWS = 5
+
+
+def as_categories(chunk):
+    """``chunk`` with its categorical columns as pandas categoricals (a shallow copy)."""
+    convert = {col: chunk[col].astype("category") for col in CATEGORICAL_COLUMNS
+               if col in chunk and not isinstance(chunk[col].dtype, pd.CategoricalDtype)}
+    return chunk.assign(**convert) if convert else chunk
+
+
+class UploadValidator:
+    """Counts and sample row numbers of every (column, check) failure across chunks.
+
+    Each chunk is checked with whole-column comparisons: one NaN mask and two range
+    comparisons over the numeric block, and one vocabulary lookup per categorical
+    column. Row numbers are 1-based data rows of the whole file.
+    """
+
+    def __init__(self, col_info, vocabularies, sample_rows=SAMPLE_ROWS, reject=()):
+        self.vocabularies = vocabularies
+        ranges = [np.asarray(col_info[col], dtype=np.float64) for col in NUM_COLS_TO_SCALE]
+        self.low = np.array([np.nanmin(values) for values in ranges])
+        self.high = np.array([np.nanmax(values) for values in ranges])
+        self.sample_rows = sample_rows
+        self.reject = list(reject)
+        self.counts = {}
+        self.samples = {}
+        self.rows = 0
+        self.rejected = 0
+
+    def _record(self, col, check, mask, offset):
+        found = np.flatnonzero(mask)
+        if not len(found):
+            return
+        key = (col, check)
+        self.counts[key] = self.counts.get(key, 0) + len(found)
+        samples = self.samples.setdefault(key, [])
+        if len(samples) < self.sample_rows:
+            samples.extend((found[:self.sample_rows - len(samples)] + offset + 1).tolist())
+
+    def check(self, chunk):
+        """Record the failures of one raw chunk; returns a per-row mask of rejected rows."""
+        missing_columns = [col for col in RAW_COLUMNS if col not in chunk]
+        if missing_columns:
+            raise ValueError(f"Input is missing required columns: {missing_columns}")
+        offset = self.rows
+        self.rows += len(chunk)
+        rejected = np.zeros(len(chunk), dtype=bool)
+
+        values = chunk[NUM_COLS_TO_SCALE].to_numpy(dtype=np.float64)
+        masks = {MISSING: np.isnan(values), BELOW_RANGE: values < self.low, ABOVE_RANGE: values > self.high}
+        for check, mask in masks.items():
+            for j in np.flatnonzero(mask.any(axis=0)):
+                self._record(NUM_COLS_TO_SCALE[j], check, mask[:, j], offset)
+            if check in self.reject:
+                rejected |= mask.any(axis=1)
+
+        for col in CATEGORICAL_COLUMNS:
+            missing = pd.isna(chunk[col]).to_numpy()
+            unknown = (self.vocabularies[col].lookup_codes(chunk[col]) < 0) & ~missing
+            self._record(col, MISSING, missing, offset)
+            self._record(col, UNKNOWN_CATEGORY, unknown, offset)
+            if UNKNOWN_CATEGORY in self.reject:
+                rejected |= unknown
+            if MISSING in self.reject:
+                rejected |= missing
+
+        self.rejected += int(rejected.sum())
+        return rejected
+
+    def filter(self, chunk):
+        """Check a chunk and return it without the rejected rows.
+
+        String categorical columns are dictionary-encoded first (as Arrow inputs already
+        are), so the check and the encoder both resolve each distinct label once.
+        """
+        chunk = as_categories(chunk)
+        rejected = self.check(chunk)
+        return chunk[~rejected] if rejected.any() else chunk
+
+    def report(self):
+        """One row per failing (column, check): ROWS, SHARE and SAMPLE_ROWS."""
+        records = [{
+            "COLUMN": col,
+            "CHECK": check,
+            "ROWS": self.counts[(col, check)],
+            "SHARE": self.counts[(col, check)] / max(self.rows, 1),
+            "REJECTED": check in self.reject,
+            "SAMPLE_ROWS": ", ".join(map(str, self.samples[(col, check)])),
+        } for check in CHECKS for col in RAW_COLUMNS if (col, check) in self.counts]
+        return pd.DataFrame(records, columns=["COLUMN", "CHECK", "ROWS", "SHARE", "REJECTED", "SAMPLE_ROWS"])
+
+
+def validated(chunks, validator):
+    """Pass raw chunks through ``validator``, dropping the rows it rejects."""
+    for chunk in chunks:
+        yield validator.filter(chunk)
@@ -0,0 +1,123 @@
+"""Background warm-up of the dashboard's per-process caches, with a readiness flag.
+
+serve.py starts the warm-up when a worker process starts, before Streamlit serves any
+session; without serve.py the app starts it on first import. The steps call the
+plain loaders in resources.py, which the app reads through as well.
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from encoding import NUM_COLS_TO_SCALE
+from resources import (load_artifacts, load_col_info, load_counterfactual_search, load_encoder, load_model,
+                       load_static_figures)
+from scoring import score_with_contributions
+
+# One warm-up per model version and process
+_warmups = {}
+_warmups_lock = threading.Lock()
+
+
+def probe_profile(col_info, vocabularies):
+    """Raw values of a typical subscriber: median numerics and the first label of each category."""
+    profile = {col: float(np.nanmedian(np.asarray(col_info[col], dtype=np.float64))) for col in NUM_COLS_TO_SCALE}
+    profile.update({col: vocab.labels[0] for col, vocab in vocabularies.items()})
+    return profile
+
+
+def probe_prediction(model, encoder, col_info):
+    """Score the probe subscriber through the single-prediction path; fails on a bad probability."""
+    x = encoder.encode_row(probe_profile(col_info, encoder.vocabularies))
+    probs, _, _ = score_with_contributions(model, x, encoder.feature_means)
+    prob = float(probs[0])
+    if not 0.0 <= prob <= 1.0:
+        raise RuntimeError(f"Probe prediction returned {prob!r}")
+    return prob
+
+
+def prime_plotting():
+    """Build and serialise one figure so Plotly's lazily imported validators are loaded."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+    go.Figure(go.Indicator(mode="gauge+number", value=50, gauge={"axis": {"range": [0, 100]}})).to_json()
+    px.bar(x=["a"], y=[1]).to_json()
+
+
+class Warmup:
+    """Runs named steps once, in order, and records how long each took.
+
+    ``start()`` runs them on a daemon thread; ``ready`` is set once every step has
+    finished, so callers can check ``is_ready()`` or ``wait()``. A failing step is
+    recorded in ``status()`` and does not stop the others: the code path it primes
+    simply pays its own cost on first use.
+    """
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.ready = threading.Event()
+        self.results = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def run(self):
+        for name, step in self.steps:
+            start = time.perf_counter()
+            try:
+                step()
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            with self._lock:
+                self.results.append((name, time.perf_counter() - start, error))
+        self.ready.set()
+        return self
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def is_ready(self):
+        return self.ready.is_set()
+
+    def wait(self, timeout=None):
+        return self.ready.wait(timeout)
+
+    @property
+    def errors(self):
+        with self._lock:
+            return [(name, error) for name, _, error in self.results if error]
+
+    def status(self):
+        """One row per step: STEP, SECONDS and STATUS (pending, ok or the error)."""
+        with self._lock:
+            done = {name: (seconds, error) for name, seconds, error in self.results}
+        return pd.DataFrame([{
+            "STEP": name,
+            "SECONDS": done[name][0] if name in done else np.nan,
+            "STATUS": (done[name][1] or "ok") if name in done else "pending",
+        } for name, _ in self.steps])
+
+
+def warmup_steps(version):
+    """The warm-up steps for one model version, in the order the first session needs them."""
+    return [
+        ("Model and column stats", lambda: load_artifacts(version)),
+        ("Encoder", lambda: load_encoder(version)),
+        ("Counterfactual search", lambda: load_counterfactual_search(version)),
+        ("Plotly", prime_plotting),
+        ("Static figures", load_static_figures),
+        ("Probe prediction", lambda: probe_prediction(load_model(version), load_encoder(version),
+                                                      load_col_info(version))),
+    ]
+
+
+def start_warmup(version):
+    """This process's warm-up for ``version``, started on the first call; later calls return it."""
+    with _warmups_lock:
+        if version not in _warmups:
+            _warmups[version] = Warmup(warmup_steps(version)).start()
+        return _warmups[version]